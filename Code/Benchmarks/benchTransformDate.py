@@ -0,0 +1,126 @@
+#Imports
+import re
+import time
+from datetime import datetime
+import pandas as pd
+import numpy as np
+
+#Import own functions
+from Code.ImportData.GVBData import transformDate
+
+
+def transformDateRowwise(df, stations):
+    """
+    Reference implementation of GVBData.transformDate, which transforms the dates row by row.
+    Only kept to compare the output and speed of the columnar implementation. Uses datetime.strptime, 
+    which pd.Timestamp.strptime wrapped in the pandas versions this code was written for.
+
+    Parameters:
+    - df(pandas df): The passenger DF
+    - stations(list): What stations were included
+
+    Returns: Fully constructed GVB DF
+    """
+
+    #Possible data formats that the given df contains
+    date_format_1 = '%m/%d/%Y %H:%M:%S'
+    date_format_2 = '%m/%d/%Y %H:%M:%S'
+
+    df = df.fillna(0.0)
+    df["weekday"] = 99
+    df["is_weekend"] = 0
+
+    df_dict = df.to_dict("index")
+
+    for k, v in df_dict.items():
+        time_blok = v["Hour"][:5]
+        time_blok = re.sub('[:]', '', time_blok)
+        v["Hour"] = int(time_blok)
+
+        if v["Hour"] == 0:
+            v["Hour"] = 2400
+
+        v["Date"] = v["Date"][:-3]
+
+        try:
+            date = datetime.strptime(v["Date"], date_format_1)
+            v["weekday"] = date.weekday()
+        except:
+            date = datetime.strptime(v["Date"], date_format_2)
+            v["weekday"] = date.weekday()
+
+        if date.weekday() == 5 or date.weekday() == 6:
+            v["is_weekend"] = 1
+
+        v["Date"] = date.date()
+
+    return pd.DataFrame.from_dict(df_dict, orient="index")
+
+
+def generateGVBData(n_rows, stations):
+    """
+    This function generates a synthetic merged station DF, in the same format as GVBData.stationData returns
+
+    Parameters:
+    - n_rows (int): number of rows to generate
+    - stations (list): stations to generate passenger columns for
+
+    Returns: Synthetic GVB DF
+    """
+
+    rng = np.random.default_rng(42)
+
+    #Dates and hours in the format of the GVB reisdata
+    dates = pd.date_range("2015-01-01", periods=max(1, n_rows // 24 + 1), freq="D")
+    date_strings = np.array(["{0}/{1}/{2} 12:00:00 AM".format(d.month, d.day, d.year) for d in dates])
+    hour_strings = np.array(["{0:02d}:00 - {0:02d}:59".format(h) for h in range(24)])
+
+    df = pd.DataFrame({"Date": date_strings[np.arange(n_rows) // 24],
+                       "Hour": hour_strings[np.arange(n_rows) % 24]})
+
+    #Add passenger counts with some missing values
+    for station in stations:
+        arrivals = rng.integers(0, 500, n_rows).astype(float)
+        arrivals[rng.random(n_rows) < 0.01] = np.nan
+        df[station + " Arrivals"] = arrivals
+        df[station + " Departures"] = rng.integers(0, 500, n_rows).astype(float)
+
+    return df
+
+
+def benchmark(n_rows=1000000, stations=["Nieuwmarkt", "Dam"]):
+    """
+    This function compares the row by row and the columnar implementation of transformDate on the same data
+
+    Parameters:
+    - n_rows (int): number of rows to benchmark on
+    - stations (list): stations to generate passenger columns for
+
+    Returns: Dict with the run time of both implementations in seconds
+    """
+
+    df = generateGVBData(n_rows, stations)
+
+    #Time the row by row implementation
+    start = time.perf_counter()
+    rowwise_df = transformDateRowwise(df.copy(), stations)
+    rowwise_time = time.perf_counter() - start
+
+    #Time the columnar implementation
+    start = time.perf_counter()
+    columnar_df = transformDate(df.copy(), stations)
+    columnar_time = time.perf_counter() - start
+
+    #Check whether both implementations give the same output
+    pd.testing.assert_frame_equal(rowwise_df, columnar_df, check_dtype=False)
+
+    print("Rows: {0}".format(n_rows))
+    print("Row by row: {0:.2f}s".format(rowwise_time))
+    print("Columnar: {0:.2f}s".format(columnar_time))
+    print("Speedup: {0:.1f}x".format(rowwise_time / columnar_time))
+
+    return {"rowwise": rowwise_time, "columnar": columnar_time}
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,100 @@
+#Imports
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+
+#Import own functions
+from Code.Models.XGBoostModels import EarlyStoppingXGBRegressor, EarlyStoppingXGBClassifier
+from Code.Models.TreeEnsemble import exportEnsemble
+
+
+def generateModelData(n_rows, n_features):
+    """
+    This function generates a synthetic training set with a numerical crowdedness count and 4 crowdedness classes
+
+    Parameters:
+    - n_rows (int): number of rows to generate
+    - n_features (int): number of features to generate
+
+    Returns: Features, counts and classes
+    """
+
+    rng = np.random.default_rng(42)
+
+    x = rng.random((n_rows, n_features))
+    counts = x @ rng.random(n_features) * 100 + rng.gamma(2, 10, n_rows)
+    classes = np.searchsorted(np.quantile(counts, [.25, .5, .75]), counts, side="right") + 1
+
+    return x, counts, classes
+
+
+def timePredict(model, x, repeats):
+    """
+    This function returns the fastest run time of the predictions of a model
+
+    Parameters:
+    - model (model): model (estimator or TreeEnsemble)
+    - x (array): features
+    - repeats (int): number of times the predictions are generated
+
+    Returns: Run time in seconds
+    """
+
+    times = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        model.predict(x)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def benchmark(n_rows=20000, n_features=20, n_predict=100000):
+    """
+    This function compares the predictions of the forest and XGBoost models with the predictions of their exported tree
+    ensembles, on a single row and on a large batch of rows
+
+    Parameters:
+    - n_rows (int): number of rows to train the models on
+    - n_features (int): number of features
+    - n_predict (int): number of rows of the large batch
+
+    Returns: Dict with per model the run time of both implementations in seconds, per batch size
+    """
+
+    x, counts, classes = generateModelData(n_rows, n_features)
+    x_predict = np.random.default_rng(0).random((n_predict, n_features))
+
+    models = {"rfg": RandomForestRegressor(n_estimators=100, max_features="sqrt", random_state=42).fit(x, counts),
+              "rfc": RandomForestClassifier(n_estimators=100, max_features="sqrt", random_state=42).fit(x, classes),
+              "xgbr": EarlyStoppingXGBRegressor(n_estimators=300, learning_rate=0.05, max_depth=8,
+                                                objective="reg:tweedie", random_state=42).fit(x, counts),
+              "xgbc": EarlyStoppingXGBClassifier(n_estimators=100, learning_rate=0.05, max_depth=8,
+                                                 objective="multi:softmax", random_state=42).fit(x, classes)}
+
+    results = {}
+    for name, model in models.items():
+        ensemble = exportEnsemble(model)
+
+        #Check whether both implementations give the same predictions. XGBoost sums the leaf values as float32, so the
+        #predictions can differ by the rounding of the float32 sum over all trees
+        if hasattr(model, "classes_"):
+            np.testing.assert_array_equal(model.predict(x_predict), ensemble.predict(x_predict))
+            np.testing.assert_allclose(model.predict_proba(x_predict), ensemble.predict_proba(x_predict), atol=1e-5)
+        else:
+            np.testing.assert_allclose(model.predict(x_predict), ensemble.predict(x_predict), rtol=1e-4)
+
+        results[name] = {}
+        for batch, x_batch, repeats in [("1 row", x_predict[:1], 50), ("{0} rows".format(n_predict), x_predict, 3)]:
+            results[name][batch] = {"original": timePredict(model, x_batch, repeats),
+                                    "tree engine": timePredict(ensemble, x_batch, repeats)}
+
+            print("{0}, {1}: original {2:.4f}s, tree engine {3:.4f}s, speedup {4:.1f}x".format(
+                name, batch, results[name][batch]["original"], results[name][batch]["tree engine"],
+                results[name][batch]["original"] / results[name][batch]["tree engine"]))
+
+    return results
+
+
+if __name__ == '__main__':
+    benchmark()
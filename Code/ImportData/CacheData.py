@@ -0,0 +1,144 @@
+#Imports
+import os
+import re
+import hashlib
+import inspect
+import pandas as pd
+
+def fileHash(path, block_size=2**20):
+    """
+    This function returns the hash of the contents of a file, read in blocks so large files don't have to fit in memory
+
+    Parameters:
+    - path (str): path to the file
+    - block_size (int): number of bytes read at once
+
+    Returns: Hex digest of the file contents
+    """
+
+    file_hash = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def readerHash(reader):
+    """
+    This function returns the hash of the code that parses a file: the script that defines the reader and the pandas 
+    version. Cached frames are parsed again when the parser changes.
+
+    Parameters:
+    - reader (function): function that takes the path and returns the parsed frame
+
+    Returns: Hex digest of the reader code
+    """
+
+    reader_hash = hashlib.sha256(pd.__version__.encode())
+
+    try:
+        reader_hash.update(fileHash(inspect.getsourcefile(reader)).encode())
+    except TypeError:
+        #Readers without source file (builtins) are identified by their name
+        reader_hash.update(repr(reader).encode())
+
+    return reader_hash.hexdigest()
+
+
+def cacheName(path):
+    """
+    This function returns the name of the cached frames of an input file: the file name and the hash of its full path, 
+    so input files with the same name in different dirs get their own cached frames
+
+    Parameters:
+    - path (str): path to the input file
+
+    Returns: Name of the cached frames (str)
+    """
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    path_hash = hashlib.sha256(os.path.normcase(os.path.realpath(path)).encode()).hexdigest()[:8]
+
+    return "{0}_{1}".format(name, path_hash)
+
+
+def cacheKey(path, params, reader=None):
+    """
+    This function returns the key of a cached file, based on the contents of the file, the parameters used to parse it
+    and the code of the reader (see readerHash)
+
+    Parameters:
+    - path (str): path to the input file
+    - params: parameters that change the parsed frame (None if the file is read as is)
+    - reader (function): function that parses the file
+
+    Returns: Cache key (str)
+    """
+
+    key = hashlib.sha256()
+    key.update(fileHash(path).encode())
+    key.update(repr(params).encode())
+    if reader is not None:
+        key.update(readerHash(reader).encode())
+
+    return key.hexdigest()[:32]
+
+
+def readCached(path, reader, cache_dir, params=None):
+    """
+    This function returns the parsed frame of an input file from the cache if the file, parameters and reader didn't 
+    change.
+    Otherwise the file is parsed with the given reader and the frame is saved in the cache as parquet file. Frames
+    that can't be saved as parquet (e.g. columns with both numbers and strings) are saved as pickle.
+
+    Parameters:
+    - path (str): path to the input file
+    - reader (function): function that takes the path and returns the parsed frame
+    - cache_dir (str): dir where the cached frames are saved (if None, the file is always parsed)
+    - params: parameters that change the parsed frame, part of the cache key
+
+    Returns: Parsed frame of the input file
+    """
+
+    #If no cache is used, parse the file
+    if cache_dir is None:
+        return reader(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    #Path of the cached frame, without extension
+    name = cacheName(path)
+    cache_path = os.path.join(cache_dir, "{0}_{1}".format(name, cacheKey(path, params, reader)))
+
+    #Return the cached frame if present
+    if os.path.isfile(cache_path + ".parquet"):
+        return pd.read_parquet(cache_path + ".parquet")
+    elif os.path.isfile(cache_path + ".pkl"):
+        return pd.read_pickle(cache_path + ".pkl")
+
+    #################################################################################
+
+    #Remove outdated cached frames of the same file, only names of the form "<name>_<path hash>_<key>.<extension>" 
+    #match, so the cached frames of other files (e.g. arr_2020.csv, or arr.csv in another dir) are kept. Frames cached
+    #before the path hash was part of the name ("<file name>_<key>.<extension>") are outdated as well
+    outdated = re.compile(r"{0}_[0-9a-f]{{32}}\.(parquet|pkl)".format(re.escape(name)))
+    legacy = re.compile(r"{0}_[0-9a-f]{{32}}\.(parquet|pkl)".format(
+        re.escape(os.path.splitext(os.path.basename(path))[0])))
+    for file in os.listdir(cache_dir):
+        if outdated.fullmatch(file) or legacy.fullmatch(file):
+            os.remove(os.path.join(cache_dir, file))
+
+    #Parse the file
+    df = reader(path)
+
+    #Save the parsed frame in the cache
+    try:
+        df.to_parquet(cache_path + ".parquet")
+    except (TypeError, ValueError):
+        if os.path.isfile(cache_path + ".parquet"):
+            os.remove(cache_path + ".parquet")
+        df.to_pickle(cache_path + ".pkl")
+
+    return df
@@ -1,10 +1,11 @@
 #Imports
 import pandas as pd
 import numpy as np
-import pickle
-from sklearn.metrics.pairwise import rbf_kernel 
 from sklearn.preprocessing import StandardScaler
 
+#Import Functions other files
+import Code.ImportData.StationWeights as sw
+
 def strToTimestamp(df, format):
     """
     This function converts a pandas.df column to Timestamp object
@@ -97,60 +98,145 @@ def changeStartEndDate(sensor_df, gvb_df, event_df):
     return sensor_df, gvb_df, event_df
 
 
-def calculateWeights(stations, df):
+def selectNewDates(sensor_df, gvb_df, event_df, last_date):
     """
-    This function returns a dict with scaled rbk kernels, representing the distance between each station and sensor. 
+    This function selects the rows of df's with a date after the given date. The readers already drop the older rows 
+    while reading the input files (see constructFullDataset.constructDF), this only removes the rows left by the 
+    start and end dates of the combined sources
+    
+    Parameters:
+    - sensor_df (df): sensor data
+    - gvb_df (df): gvb data
+    - event_df (df): event data
+    - last_date (Timestamp): last date of the existing dataset
+
+    Returns: Returns all DF's with the dates after last_date
+    """
+
+    sensor_df = sensor_df[sensor_df["Date"] > last_date].reset_index().drop(columns=["index"])
+    gvb_df = gvb_df[gvb_df["Date"] > last_date].reset_index().drop(columns=["index"])
+    event_df = event_df[event_df["Date"] > last_date].reset_index().drop(columns=["index"])
+
+    return sensor_df, gvb_df, event_df
+
+
+def calculateWeights(stations, df, latscaler, lonscaler, weights_filename):
+    """
+    This function returns the rbf kernels of the scaled coordinates, representing the distance between each station 
+    and sensor. 
 
     Parameters:
     - stations (list): all relevant stations
     - df (df): where the latitudes and longitudes of each station and sensor are stored
+    - latscaler (dict): scaler of the latitudes (see StationWeights.loadScaler)
+    - lonscaler (dict): scaler of the longitudes (see StationWeights.loadScaler)
+    - weights_filename (str): where the weight matrix should be stored
 
-    Returns: Dict with all scaled weights per sensor, per station
+    Returns: DF with all weights per sensor, per station
     """
 
-    #Variables
+    #Coordinates of each sensor present in full dataset (first row of the sensor)
+    sensors = df.drop_duplicates("Sensor")
+    sensor_coordinates = dict(zip(sensors["Sensor"], zip(sensors["SensorLatitude"], sensors["SensorLongitude"])))
 
-    #List all sensors present in full dataset
-    sensors = df["Sensor"].unique()
+    #Coordinates of each station
+    station_coordinates = {station: (df[station + " Lat"][0], df[station + " Lon"][0]) for station in stations}
 
-    weights = {}
+    return sw.stationWeights(sensor_coordinates, station_coordinates, latscaler, lonscaler, weights_filename)
 
-    #################################################################################
 
-    #Loop over all the sensors
-    for sensor in sensors:
+def eventFeatures(event_df):
+    """
+    This function reduces the event data to a single row per date, so merging it on date doesn't duplicate rows
 
-        #Make an array with the latitude and longitude of the sensor
-        x = np.array(df[df["Sensor"] == sensor].reset_index()["SensorLatitude"][0],
-                     df[df["Sensor"] == sensor].reset_index()["SensorLongitude"][0]).reshape(1, -1)
+    Parameters:
+    - event_df (df): event data, one row per event date
 
-        station_weights = {}
-        #Loop over all stations
-        for station in stations:
+    Returns: DF with per date whether there is an event (is_event) and the number of events (event_count)
+    """
 
-            #Make an array with the latitude and longitude of the station
-            y = np.array(df[station + " Lat"][0],
-                          df[station + " Lon"][0]).reshape(1, -1)
+    #Count the number of events per date
+    event_df = event_df.groupby("Date").size().reset_index(name="event_count")
 
-            #Add station weight
-            station_weights[station + " weight"] = rbf_kernel(x, y)
+    #Save confirmation that there is an event
+    event_df.insert(1, "is_event", 1.0)
+    event_df["event_count"] = event_df["event_count"].astype(float)
 
-        weights[sensor] = station_weights
+    return event_df
 
-    return weights
 
+def mergeFanOut(left, right, on, how, name, unique="right"):
+    """
+    This function merges two DF's of which one should have a single row per key, so the merge doesn't duplicate the 
+    rows of the other DF. If keys are present multiple times, the merge is stopped with the number of rows it would 
+    duplicate.
 
-def constructFullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scaler_filename):
+    Parameters:
+    - left (df): left DF of the merge
+    - right (df): right DF of the merge
+    - on (list): columns to merge on
+    - how (str): type of merge
+    - name (str): name of the merge used in the error
+    - unique (str): DF that should have a single row per key ("left" or "right")
+
+    Returns: Merged DF
     """
-    This function combines all the previously constructed DF's and merges them into one. In addition, time is transformed into a cyclic continuous feature.
+
+    #DF with a single row per key, and the DF of which the rows should not be duplicated
+    single, other = (right, left) if unique == "right" else (left, right)
+
+    #Rows of the other DF that match a key present multiple times are duplicated (one-to-many)
+    counts = single.groupby(on).size()
+    counts = counts[counts > 1]
+    if not counts.empty:
+        matches = pd.merge(other[on], counts.rename("count").reset_index(), on=on, how="inner")
+        fan_out = int((matches["count"] - 1).sum())
+        raise ValueError("Merge {0} duplicates {1} rows, {2} keys are present multiple times in the {3} DF".format(
+            name, fan_out, len(counts), unique))
+
+    df = pd.merge(left, right, on=on, how=how)
+
+    #A left merge keeps exactly the rows of the left DF
+    if how == "left" and len(df) > len(left):
+        raise ValueError("Merge {0} added {1} rows to the left DF".format(name, len(df) - len(left)))
+
+    return df
+
+
+def mergeSources(sensor_df, gvb_df, event_df):
+    """
+    This function merges the sensor, GVB and event data into one DF. The GVB data has a single row per date and hour,
+    and the event data is reduced to a single row per date, so the merges never duplicate sensor rows.
 
     Parameters:
     - sensor_df (df): sensor data
     - gvb_df (df): gvb data
     - event_df (df): event data
+
+    Returns: Merged DF
+    """
+
+    #Reduce the event data to one row per date
+    event_df = eventFeatures(event_df)
+
+    #Combine DF's
+    gvb_sensor_df = mergeFanOut(gvb_df, sensor_df, ["Date", "Hour", "weekday"], "outer", "GVB/Sensor", unique="left")
+    full_df = mergeFanOut(gvb_sensor_df, event_df, ["Date"], "outer", "Events", unique="right")
+
+    return full_df
+
+
+def constructFullDF(full_df, stations, lat_scaler_filename, lon_scaler_filename, weights_filename, fit_scalers=True):
+    """
+    This function adds the features to the merged DF (see mergeSources). In addition, time is transformed into a cyclic continuous feature.
+
+    Parameters:
+    - full_df (df): merged sensor, gvb and event data
     - stations (list): all relevant stations
     - lat_scaler_filename (str): where the scalar for lat weights should be stored
     - lon_scaler_filename (str): where the scalar for lon weights should be stored
+    - weights_filename (str): where the station weight matrix should be stored
+    - fit_scalers (bool): if False, the saved scalers are used instead of fitting new ones (incremental update)
 
     Returns: Full GVB that contains all relevant data
     """
@@ -159,11 +245,6 @@ def constructFullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename,
     latscaler = StandardScaler()
     lonscaler = StandardScaler()
 
-    #Combine DF's
-    gvb_sensor_df = pd.merge(gvb_df, sensor_df, on=[
-        "Date", "Hour", "weekday"], how="outer")
-    full_df = pd.merge(gvb_sensor_df, event_df, on=["Date"], how="outer")
-
     #################################################################################
 
     #Sort keys on date
@@ -200,64 +281,68 @@ def constructFullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename,
         lats.append(full_df[station + " Lat"].values)
         lons.append(full_df[station + " Lon"].values)
 
-    #Fit the scalars to the data
-    lats = np.asarray(lats).reshape(-1, 1)
-    latscaler.fit(lats)
+    if fit_scalers:
+        #Fit the scalars to the data
+        lats = np.asarray(lats).reshape(-1, 1)
+        latscaler.fit(lats)
 
-    lons = np.asarray(lons).reshape(-1, 1)
-    lonscaler.fit(lons)
+        lons = np.asarray(lons).reshape(-1, 1)
+        lonscaler.fit(lons)
 
-    #Save the scalars for later use
-    pickle.dump(latscaler, open(lat_scaler_filename, 'wb'))
-    pickle.dump(lonscaler, open(lon_scaler_filename, 'wb'))
+        #Save the mean and scale of the scalars for later use, so these can be used without sklearn
+        latscaler = sw.saveScaler(latscaler, lat_scaler_filename)
+        lonscaler = sw.saveScaler(lonscaler, lon_scaler_filename)
+    else:
+        #Import the scalars fitted on the existing dataset
+        latscaler = sw.loadScaler(lat_scaler_filename)
+        lonscaler = sw.loadScaler(lon_scaler_filename)
 
     #Scale the sensor coordinates
-    full_df["Latscaled"] = latscaler.transform(
-        full_df["SensorLatitude"].values.reshape(-1, 1))
-    full_df["Lonscaled"] = lonscaler.transform(
-        full_df["SensorLongitude"].values.reshape(-1, 1))
+    full_df["Latscaled"] = sw.scaleCoordinates(
+        full_df["SensorLatitude"].values.reshape(-1, 1), latscaler)
+    full_df["Lonscaled"] = sw.scaleCoordinates(
+        full_df["SensorLongitude"].values.reshape(-1, 1), lonscaler)
 
     #Scale the station coordinates
     for station in stations:
-        full_df[station + " LatScaled"] = latscaler.transform(
-            full_df[station + " Lat"].values.reshape(-1, 1))
-        full_df[station + " LonScaled"] = lonscaler.transform(
-            full_df[station + " Lon"].values.reshape(-1, 1))
+        full_df[station + " LatScaled"] = sw.scaleCoordinates(
+            full_df[station + " Lat"].values.reshape(-1, 1), latscaler)
+        full_df[station + " LonScaled"] = sw.scaleCoordinates(
+            full_df[station + " Lon"].values.reshape(-1, 1), lonscaler)
 
     #################################################################################
 
-    # #Construct dict with station weigths
-    station_weights = calculateWeights(stations, full_df)
+    #Construct matrix with station weigths
+    station_weights = calculateWeights(stations, full_df, latscaler, lonscaler, weights_filename)
 
     #################################################################################
 
-    #Transform DF to Dict
-    time_dict = full_df.to_dict("index")
-
     #Transform Date to seperate year, month, day and hour. And transform month, day, hour to cos/sin to make it circular
-    for k, v in time_dict.items():
-        v["Year"] = v["Date"].year
+    month = full_df["Date"].dt.month.values
+    day = full_df["Date"].dt.day.values
+    hour = full_df["Hour"].values
+
+    full_df["Year"] = full_df["Date"].dt.year.values
 
-        v["month_sin"] = np.sin(2 * np.pi * v["Date"].month / 12)
-        v["month_cos"] = np.cos(2 * np.pi * v["Date"].month / 12)
+    full_df["month_sin"] = np.sin(2 * np.pi * month / 12)
+    full_df["month_cos"] = np.cos(2 * np.pi * month / 12)
 
-        v["day_sin"] = np.sin(2 * np.pi * v["Date"].day / 365)
-        v["day_cos"] = np.cos(2 * np.pi * v["Date"].day / 365)
+    full_df["day_sin"] = np.sin(2 * np.pi * day / 365)
+    full_df["day_cos"] = np.cos(2 * np.pi * day / 365)
 
-        v["hour_sin"] = np.sin(2 * np.pi * v["Hour"] / 2400)
-        v["hour_cos"] = np.cos(2 * np.pi * v["Hour"] / 2400)
+    full_df["hour_sin"] = np.sin(2 * np.pi * hour / 2400)
+    full_df["hour_cos"] = np.cos(2 * np.pi * hour / 2400)
 
-        #Loop over all stations
-        for station in stations:
-            #Add station weight
-            v[station + " weight"] = station_weights[v["Sensor"]][station + " weight"][0][0]
+    #Look up the station weights of the sensor of each row
+    weights_df = station_weights.reindex(full_df["Sensor"].values)
 
-            v[station + " passengers"] = v[station +
-                                           " Arrivals"] + v[station + " Departures"]
+    #Loop over all stations
+    for station in stations:
+        #Add station weight
+        full_df[station + " weight"] = weights_df[station + " weight"].values
 
-    #Transform dict back to DF
-    full_df = pd.DataFrame.from_dict(
-        time_dict, orient="index").reset_index().drop(columns="index")
+        full_df[station + " passengers"] = full_df[station +
+                                                   " Arrivals"] + full_df[station + " Departures"]
 
     # #################################################################################
 
@@ -269,7 +354,8 @@ def constructFullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename,
     return full_df
 
 
-def fullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scaler_filename):
+def fullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scaler_filename, weights_filename,
+           last_date=None):
     """
     This functions constructs the full DF by combining previously constructed DF's
 
@@ -280,8 +366,10 @@ def fullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scale
     - stations (list): all relevant stations
     - lat_scaler_filename (str): where the scalar for lat weights should be stored
     - lon_scaler_filename (str): where the scalar for lon weights should be stored
+    - weights_filename (str): where the station weight matrix should be stored
+    - last_date (Timestamp): if given, only the dates after this date are constructed, with the saved scalers
 
-    Returns: Full DF with all relevant data
+    Returns: Full DF with all relevant data (None if there are no dates after last_date)
     """
 
     #Import the needed CSV files
@@ -291,8 +379,19 @@ def fullDF(sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scale
     sensor_df, gvb_df, event_df = changeStartEndDate(
         sensor_df, gvb_df, event_df)
 
+    #Only keep the dates after the last date of the existing dataset
+    if last_date is not None:
+        sensor_df, gvb_df, event_df = selectNewDates(sensor_df, gvb_df, event_df, last_date)
+
+        #No new dates to add
+        if gvb_df.empty:
+            return None
+
+    #Merge the DF's, the merges are stopped if they would duplicate rows
+    full_df = mergeSources(sensor_df, gvb_df, event_df)
+
     #Form full DF
     full_df = constructFullDF(
-        sensor_df, gvb_df, event_df, stations, lat_scaler_filename, lon_scaler_filename)
+        full_df, stations, lat_scaler_filename, lon_scaler_filename, weights_filename, fit_scalers=last_date is None)
 
     return full_df
\ No newline at end of file
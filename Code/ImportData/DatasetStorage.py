@@ -0,0 +1,251 @@
+#Imports
+import os
+import glob
+import shutil
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+
+def datasetColumns(path):
+    """
+    This function returns the column order of the saved parquet dataset. Partition columns are saved in the dir
+    names instead of the files, so these are placed back at their original position.
+
+    Parameters:
+    - path (str): dir of the parquet dataset
+
+    Returns: List with the column names
+    """
+
+    #The pandas metadata of each file contains the columns of the original DF
+    filename = glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True)[0]
+
+    return [col["name"] for col in pq.read_schema(filename).pandas_metadata["columns"]]
+
+
+def lastDate(output_dict, params_dict):
+    """
+    This function returns the last date of the saved full dataset.
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - params_dict (dict): all general hyperparameters that can be changed by user
+
+    Returns: Last date in the dataset (Timestamp), None if there is no dataset
+    """
+
+    #Parquet dataset, only the partition of the last month has to be read
+    if params_dict["dataset_format"] == "parquet":
+        path = output_dict["full_df_parquet"]
+
+        months = [name.split("=", 1)[1] for name in os.listdir(path) if name.startswith("Month=")] if \
+            os.path.isdir(path) else []
+        if not months:
+            return None
+
+        dates = pd.read_parquet(path, columns=["Date"], filters=[("Month", "==", max(months))])["Date"]
+        return dates.max()
+
+    #################################################################################
+
+    #CSV dataset, sorted on date, so only the last line of the file has to be read
+    path = output_dict["full_df"]
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as f:
+        #Find the index of the date column in the header
+        header = f.readline()
+        date_col = header.decode().rstrip("\r\n").split(",").index("Date")
+
+        #Read blocks from the end of the file, until the block contains the full last line
+        size = f.seek(0, os.SEEK_END)
+        block_size = 2**12
+        while True:
+            f.seek(max(0, size - block_size))
+            lines = f.read().rstrip(b"\r\n").split(b"\n")
+            if len(lines) > 1 or block_size >= size:
+                break
+            block_size *= 2
+
+    #The dataset contains no rows
+    if lines[-1].rstrip(b"\r") == header.rstrip(b"\r\n"):
+        return None
+
+    return pd.to_datetime(lines[-1].decode().rstrip("\r").split(",")[date_col], format="%Y-%m-%d")
+
+
+def saveDataset(df, output_dict, params_dict, append=False):
+    """
+    This function saves the full dataset. As parquet, the dataset is partitioned by month (and optionally sensor),
+    so readers only have to read the partitions they need.
+
+    Parameters:
+    - df (df): full dataset
+    - output_dict (dict): all paths of where output files should be saved
+    - params_dict (dict): all general hyperparameters that can be changed by user
+    - append (bool): if True, the rows are added to the saved dataset instead of replacing it
+
+    Returns: Saved dataset at the specified output path
+    """
+
+    #CSV dataset
+    if params_dict["dataset_format"] == "csv":
+        if append:
+            #Append in the same column order as the saved dataset
+            columns = pd.read_csv(output_dict["full_df"], nrows=0).columns
+            df[columns].to_csv(output_dict["full_df"], mode="a", header=False, index=False)
+        else:
+            df.to_csv(output_dict["full_df"], index=False)
+
+        return
+
+    #################################################################################
+
+    path = output_dict["full_df_parquet"]
+
+    #Sensor is saved as string (rows without sensor have sensor 0.0) and the month is added as partition column
+    df = df.assign(Date=pd.to_datetime(df["Date"]), Sensor=df["Sensor"].astype(str))
+    df["Month"] = df["Date"].dt.strftime("%Y-%m")
+
+    #Columns on which the dataset is partitioned
+    partition_cols = ["Month"]
+    if params_dict["partition_sensor"]:
+        partition_cols.append("Sensor")
+
+    if append:
+        #Append in the same column order as the saved dataset
+        df = df[datasetColumns(path)]
+    elif os.path.isdir(path):
+        #Remove the old dataset
+        shutil.rmtree(path)
+
+    #New files get a unique name, so appended rows never replace saved rows
+    df.to_parquet(path, partition_cols=partition_cols, index=False)
+
+
+def compactDataset(df):
+    """
+    This function reduces the memory of the full dataset, without changing any of the values:
+    - Sensor names (and other strings) are stored as category.
+    - Columns with only whole numbers (e.g. Hour, weekday, is_event, passengers) are stored as the smallest integer type.
+    - Other numeric columns are stored as float32 if none of their values change, else they are kept as float64.
+
+    All numeric columns stay numeric, so the features can still be converted into a numeric array.
+
+    Parameters:
+    - df (df): full dataset
+
+    Returns: 
+    - Compact DF with the same columns and values
+    - Dict with the memory of the DF before and after compacting, in MB
+    """
+
+    #Memory before compacting
+    memory_before = df.memory_usage(deep=True).sum()
+
+    #Loop over all columns, except for the date
+    for col in df.columns.drop("Date", errors="ignore"):
+        values = df[col]
+
+        #Sensor names
+        if not pd.api.types.is_numeric_dtype(values):
+            df[col] = values.astype("category")
+
+        #Columns with only whole numbers
+        elif pd.api.types.is_integer_dtype(values) or (values.notna().all() and (values % 1 == 0).all()):
+            df[col] = pd.to_numeric(values.astype(np.int64), downcast="integer")
+
+        #Other numeric columns, only if float32 holds the same values
+        elif values.dtype == np.float64:
+            compact_values = values.astype(np.float32)
+            if ((compact_values.astype(np.float64) == values) | values.isna()).all():
+                df[col] = compact_values
+
+    #Memory after compacting
+    memory_after = df.memory_usage(deep=True).sum()
+
+    return df, {"Dataset MB": memory_before / 2**20, "Compact Dataset MB": memory_after / 2**20}
+
+
+def loadDataset(output_dict, params_dict, columns=None, start_date=None, end_date=None, sensors=None, compact=False,
+                metrics=None):
+    """
+    This function imports the full dataset, sorted on date. Only the given columns, dates and sensors are imported.
+    As parquet, only the partitions that contain the given dates (and sensors) are read.
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - params_dict (dict): all general hyperparameters that can be changed by user
+    - columns (list): columns to import (None imports all columns)
+    - start_date (Timestamp): first date to import (None imports from the first date)
+    - end_date (Timestamp): last date to import (None imports up to the last date)
+    - sensors (list): sensors to import (None imports all sensors)
+    - compact (bool): if True, the dataset is stored in a compact form (see compactDataset)
+    - metrics (dict): if given, the memory of the imported dataset before and after compacting is added to it
+
+    Returns: DF with the full dataset, with Date as datetime
+    """
+
+    #Columns needed to select and sort the rows
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + ["Date"] + (["Sensor"] if sensors is not None else [])))
+
+    #CSV dataset, the full file is read and the rows are selected afterwards
+    if params_dict["dataset_format"] == "csv":
+        df = pd.read_csv(output_dict["full_df"], usecols=read_columns if columns is not None else None)
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d")
+
+        if start_date is not None:
+            df = df[df["Date"] >= pd.to_datetime(start_date)]
+        if end_date is not None:
+            df = df[df["Date"] <= pd.to_datetime(end_date)]
+        if sensors is not None:
+            df = df[df["Sensor"].isin(sensors)]
+
+    #################################################################################
+
+    #Parquet dataset, the rows are selected while reading
+    else:
+        path = output_dict["full_df_parquet"]
+
+        #Filters on the partitions and rows
+        filters = []
+        if start_date is not None:
+            filters.append(("Month", ">=", pd.to_datetime(start_date).strftime("%Y-%m")))
+            filters.append(("Date", ">=", pd.to_datetime(start_date)))
+        if end_date is not None:
+            filters.append(("Month", "<=", pd.to_datetime(end_date).strftime("%Y-%m")))
+            filters.append(("Date", "<=", pd.to_datetime(end_date)))
+        if sensors is not None:
+            filters.append(("Sensor", "in", [str(sensor) for sensor in sensors]))
+
+        df = pd.read_parquet(path, columns=read_columns if columns is not None else None,
+                             filters=filters if filters else None)
+
+        #Place the columns in the saved order, without the month partition column
+        order = [col for col in datasetColumns(path) if col in df.columns and col != "Month"]
+        df = df[order]
+
+        #Partition columns are imported as category
+        if "Sensor" in df.columns:
+            df["Sensor"] = df["Sensor"].astype(str)
+
+    #################################################################################
+
+    #Sort on date, the rows of a date keep the order in which they were saved (per sensor if partitioned by sensor)
+    df = df.sort_values(by=["Date"], kind="mergesort").reset_index().drop(columns=["index"])
+
+    if columns is not None:
+        df = df[list(columns)]
+
+    if compact:
+        df, memory = compactDataset(df)
+    else:
+        memory = {"Dataset MB": df.memory_usage(deep=True).sum() / 2**20}
+        memory["Compact Dataset MB"] = memory["Dataset MB"]
+
+    if metrics is not None:
+        metrics.update(memory)
+
+    return df
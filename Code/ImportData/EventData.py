@@ -2,40 +2,98 @@
 import pandas as pd
 import json
 
-def transformData(events, lat_low, lat_high, lon_low, lon_high):
+#Import Functions other files
+import Code.ImportData.CacheData as cd
+
+def streamEvents(json_events_path, block_size=2**16):
+    """
+    This function reads the JSON file with events one event at a time, so the full file never has to be in memory.
+    The file should contain a single list of events.
+
+    Parameters:
+    - json_events_path: path to event dataset
+    - block_size (int): number of characters read from the file at once
+
+    Returns: Generator that yields each event (dict)
+    """
+
+    #Variables
+
+    decoder = json.JSONDecoder()
+
+    #Characters read from the file and the position of the first character that is not decoded yet
+    buffer = ""
+    pos = 0
+
+    #Whether the opening bracket of the list has been read
+    list_start = False
+
+    #################################################################################
+
+    with open(json_events_path) as file_data:
+        while True:
+            block = file_data.read(block_size)
+            buffer = buffer[pos:] + block
+            pos = 0
+
+            #Decode all complete events in the buffer
+            while True:
+                #Skip whitespace, the opening bracket of the list and commas between the events
+                while pos < len(buffer) and (buffer[pos] in " \t\r\n," or (buffer[pos] == "[" and not list_start)):
+                    list_start = list_start or buffer[pos] == "["
+                    pos += 1
+
+                #Stop at the end of the buffer or list
+                if pos == len(buffer) or buffer[pos] == "]":
+                    break
+
+                #Try to decode the next event, if it is incomplete read the next block
+                try:
+                    event, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if block == "":
+                        raise
+                    break
+
+                yield event
+
+            #Stop at the end of the file or list
+            if block == "" or (pos < len(buffer) and buffer[pos] == "]"):
+                break
+
+
+def transformData(events, lat_low, lat_high, lon_low, lon_high, last_date=None):
     """
     This function transforms all present dates between start and end date in the following, given 
     that the coordinatees of the event fall between the given longitude and latitude borders:
     - Date(datetime): date
     - is_event(float): there is an event on the given date
 
+    Events outside the coordinate borders are skipped before their dates are read. The dates of all remaining
+    events are parsed at once.
+
     Parameters:
-    - events (json): dataset events 
+    - events (json): dataset events, can be any iterable of events (see streamEvents)
     - Coordinate borders:
         - lon_low: min value longitude
         - lon_high: max value longitude
         - lat_low: min value Latitude
         - lat_high: max value Latitude
+    - last_date (Timestamp): if given, only the dates after this date are kept
 
     Returns:DF with relevant event data
     """
 
     #Variables
 
-    #Dict where all the needed data from each instance will be saved
-    events_dict = {}
-
-    #Key for each instance in dict
-    key = 0
+    #List where the date strings of all relevant events will be saved
+    dates = []
 
     #################################################################################
 
     #Loop over all events
     for event in events:
 
-        #Save all the dates of each event in a list
-        dates = []
-
         #Set the latitude and longitude of each date of the event to a float
         lat = float(event["location"]["latitude"].replace(",", "."))
         lon = float(event["location"]["longitude"].replace(",", "."))
@@ -55,29 +113,25 @@ def transformData(events, lat_low, lat_high, lon_low, lon_high):
             #Format two --> {'singles': ['dd-mm-yyyy',..., 'dd-mm-yyyy']}
             elif "singles" in event["dates"]:
 
-                #Save entire list to dates
-                dates = event["dates"]["singles"]
+                #Append all dates to the list
+                dates.extend(event["dates"]["singles"])
 
-            #Change type from 'str' to 'datetime'
-            dates = [pd.Timestamp.strptime(date, "%d-%m-%Y") for date in dates]
-
-            #Save present date with confirmation that there is an event
-            for date in dates:
+    #################################################################################
 
-                #Dict with all data single event
-                event_date = {"Date": date, "is_event": 1.0}
+    #Change type from 'str' to 'datetime' and save present date with confirmation that there is an event
+    event_df = pd.DataFrame({"Date": pd.to_datetime(pd.Series(dates, dtype=object), format="%d-%m-%Y"),
+                             "is_event": 1.0})
 
-                #Append dict to list
-                events_dict[key] = event_date
-                key += 1
+    #Only keep the dates after the last date of the existing dataset
+    if last_date is not None:
+        event_df = event_df[event_df["Date"] > last_date].reset_index(drop=True)
 
-    #Convert Dict object to DataFrame and return it
-    return pd.DataFrame.from_dict(events_dict, orient="index")
+    return event_df
 
 
-def eventDF(json_events_path, lon_low, lon_high, lat_low, lat_high):
+def readEvents(json_events_path, lon_low, lon_high, lat_low, lat_high, last_date=None):
     """
-    This is the main functions that constructs the full events DF, by calling the needed function
+    This function imports the JSON file with events and transforms it to the events DF
 
     Parameters:
     - json_events_path: path to event dataset
@@ -86,17 +140,37 @@ def eventDF(json_events_path, lon_low, lon_high, lat_low, lat_high):
         - lon_high: max value longitude
         - lat_low: min value Latitude
         - lat_high: max value Latitude
+    - last_date (Timestamp): if given, only the dates after this date are kept
 
     Returns: Event DF
     """
 
-    #Import JSON file with Event data
-    with open(json_events_path) as file_data:
+    #Stream the events from the JSON file and transform them to desired format
+    event_df = transformData(streamEvents(json_events_path), lat_low, lat_high, lon_low, lon_high, last_date)
+
+    return event_df
 
-        #Save data as JSON object
-        events = json.load(file_data)
 
-    #Transform data to desired format
-    event_df = transformData(events, lat_low, lat_high, lon_low, lon_high)
+def eventDF(json_events_path, lon_low, lon_high, lat_low, lat_high, cache_dir=None, last_date=None):
+    """
+    This is the main functions that constructs the full events DF, by calling the needed function
+
+    Parameters:
+    - json_events_path: path to event dataset
+    - Coordinate borders:
+        - lon_low: min value longitude
+        - lon_high: max value longitude
+        - lat_low: min value Latitude
+        - lat_high: max value Latitude
+    - cache_dir (str): dir where the parsed input files are cached (if None, no cache is used)
+    - last_date (Timestamp): if given, only the dates after this date are read
+
+    Returns: Event DF
+    """
+
+    #Import the events DF, the coordinate borders and last_date are part of the cache key
+    event_df = cd.readCached(json_events_path, lambda path: readEvents(path, lon_low, lon_high, lat_low, lat_high,
+                                                                       last_date),
+                             cache_dir, params=[lon_low, lon_high, lat_low, lat_high, last_date])
 
     return event_df
\ No newline at end of file
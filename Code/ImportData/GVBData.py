@@ -1,98 +1,73 @@
 #Imports
 import json
+import numpy as np
 import pandas as pd
-import re
 
+#Import Functions other files
+import Code.ImportData.CacheData as cd
 
-def stationData(arr_df, dep_df, stations):
-    """
-    This function construct the passenger GVB DF, by summing the arrivals and departures per stattion, per hour, per date. 
-
-    Parameters: 
-    - arr_df(csv): Arrival Df (reisdata GVB).
-    - dep_df(csv): Departure DF (reisdata GVB).
-    - stations(list): Which stations to include in the df.
 
-    Returns: DF with all passenger data
+def directionData(df, station_col, hour_col, direction, stations):
     """
-    #Variables 
-
-    #Dict to save arrival data in
-    arr_dict = {}
-
-    #Dict to save departure data in
-    dep_dict = {}
-
-    #Dict to save the coordinates of each station
-    coordinate_dict = {}
-
-    #################################################################################
-
-    #for each of the given stations, construct a custom temp df
-    for station in stations:
-
-        #Arrivals
-
-        #From the arrival df, select all rows that contain the given station as arrival
-        temp_arr_df = arr_df[arr_df["AankomstHalteNaam"] == station]
-
-        #Select the usable columns and rename them
-        temp_arr_df = temp_arr_df.rename(index=str, columns={"AantalReizen": station + " Arrivals",
-                                                             "UurgroepOmschrijving (van aankomst)": "Hour", "Datum": "Date"})
-
-        #Sum the arrivals to the total number of arrivas on an hourly basis
-        temp_arr_df = temp_arr_df.groupby(["Date", "Hour"]).agg(
-            {station + " Arrivals": 'sum'}).reset_index()
+    This function sums the passengers of all given stations per station, per hour, per date, in a single groupby. 
+    Each station is returned as a seperate column.
 
-        #Save the Longitude and Latitude of the given station in dict (consistency)
-        coordinate_dict[station + " Lat"] = arr_df[arr_df["AankomstHalteNaam"]
-                                               == station].reset_index()["AankomstLon"][0]
-        coordinate_dict[station + " Lon"] = arr_df[arr_df["AankomstHalteNaam"]
-                                               == station].reset_index()["AankomstLat"][0]
-
-        #################################################################################
+    Parameters:
+    - df(df): Arrival or departure DF (reisdata GVB)
+    - station_col(str): Column that contains the station name
+    - hour_col(str): Column that contains the hour group
+    - direction(str): Suffix of the passenger columns ("Arrivals" or "Departures")
+    - stations(list): Which stations to include in the df
 
-        #Departures
+    Returns: DF with the passengers per station, on a date and hourly basis
+    """
 
-        #From the departures df, select all rows that contain the given station as departure
-        temp_dep_df = dep_df[dep_df["VertrekHalteNaam"] == station]
+    #Select only the rows of the given stations
+    df = df[df[station_col].isin(stations)]
 
-        #Select usable columns and rename them
-        temp_dep_df = temp_dep_df.rename(
-            index=str, columns={"AantalReizen": station + " Departures", "UurgroepOmschrijving (van vertrek)": "Hour",
-                                "Datum": "Date"})
+    #Sum the passengers of all stations on an hourly basis and place each station in its own column
+    df = df.groupby(["Datum", hour_col, station_col], observed=True)[
+        "AantalReizen"].sum().unstack(station_col)
 
-        #Aggregate the number of departures on an hourly basis
-        temp_dep_df = temp_dep_df.groupby(["Date", "Hour"]).agg(
-            {station + " Departures": 'sum'}).reset_index()
+    #Keep the order of the given stations and rename the columns
+    df = df.reindex(columns=stations)
+    df.columns = [station + " " + direction for station in stations]
+    df.index = df.index.rename(["Date", "Hour"])
 
-        #################################################################################
+    return df.reset_index()
 
-        #Save the temp df's in arrival and departure dict respectively
-        arr_dict["{0}".format(station)] = temp_arr_df
-        dep_dict["{0}".format(station)] = temp_dep_df
 
-        #################################################################################
+def stationData(arr_df, dep_df, stations):
+    """
+    This function construct the passenger GVB DF, by summing the arrivals and departures per stattion, per hour, per date. 
 
-    #Merge all the arrivals in one DF and all the departures in on DF
-    for i in range(len(stations)-1):
+    Parameters: 
+    - arr_df(csv): Arrival Df (reisdata GVB).
+    - dep_df(csv): Departure DF (reisdata GVB).
+    - stations(list): Which stations to include in the df.
 
-        #Merge the current df with the next df on date and hour. Each each row contains data of all stations
-        arr_dict[stations[i+1]] = pd.merge(arr_dict[stations[i]],
-                                           arr_dict[stations[i+1]], on=["Date", "Hour"], how="outer")
+    Returns: DF with all passenger data
+    """
 
-        dep_dict[stations[i+1]] = pd.merge(dep_dict[stations[i]],
-                                           dep_dict[stations[i+1]], on=["Date", "Hour"], how="outer")
+    #Sum the arrivals and departures of all stations on an hourly basis
+    temp_arr_df = directionData(arr_df, "AankomstHalteNaam",
+                                "UurgroepOmschrijving (van aankomst)", "Arrivals", stations)
+    temp_dep_df = directionData(dep_df, "VertrekHalteNaam",
+                                "UurgroepOmschrijving (van vertrek)", "Departures", stations)
 
     #Merge the arrivals and departures in one df
-    df = pd.merge(arr_dict[stations[-1]], dep_dict[stations[-1]],
-                       on=["Date", "Hour"], how="outer")
+    df = pd.merge(temp_arr_df, temp_dep_df, on=["Date", "Hour"], how="outer")
 
     #################################################################################
 
-    #Make all coordinates of each station the same value (consistency)
-    for k, v in coordinate_dict.items():
-        df[k] = v
+    #Look up the coordinates of each station from the first arrival row of that station (consistency)
+    coordinates = arr_df[arr_df["AankomstHalteNaam"].isin(stations)].drop_duplicates(
+        "AankomstHalteNaam").set_index("AankomstHalteNaam")
+
+    #Make all coordinates of each station the same value
+    for station in stations:
+        df[station + " Lat"] = coordinates.at[station, "AankomstLat"]
+        df[station + " Lon"] = coordinates.at[station, "AankomstLon"]
         
     return df
 
@@ -104,6 +79,9 @@ def transformDate(df, stations):
     - The hour is transformed to a multiple of 100 (so 01:00 becomes 100).
     - The weekday number of the date is saved.
     - Whether it's weekend is saved (no normal situation).
+
+    All transformations are done on whole columns. The date and hour strings only have a small number of 
+    unique values (one per day and one per hour block), so these are parsed once and mapped back onto the rows.
     
     Parameters:
     - df(pandas df): The passenger DF
@@ -123,59 +101,165 @@ def transformDate(df, stations):
     #Fill NaN values with 0
     df = df.fillna(0.0)
 
+    #################################################################################
+
+    #Replace time string with time blok, by parsing each unique hour string once
+    hour_codes, hour_strings = pd.factorize(df["Hour"])
+    hours = pd.Series(hour_strings).str[:5].str.replace(":", "", regex=False).astype(int)
+
+    #Replace 00:00 with 24:00
+    hours = hours.where(hours != 0, 2400).values
+    df["Hour"] = hours[hour_codes]
+
+    #################################################################################
+
+    #Remove AM/PM from the unique date strings
+    date_codes, date_strings = pd.factorize(df["Date"])
+    date_strings = pd.Series(date_strings).str[:-3]
+
+    #Transform the date strings to datetime objects, dates that fail with the first format are parsed with the second
+    dates = pd.to_datetime(date_strings, format=date_format_1, errors="coerce")
+    failed = dates.isna()
+    if failed.any():
+        dates[failed] = pd.to_datetime(date_strings[failed], format=date_format_2)
+
+    #Transform date to weekday number and check if weekday is in the weekend
+    weekdays = dates.dt.weekday.values
+    is_weekend = (weekdays >= 5).astype(int)
+
+    #Save the date object in the date column
+    df["Date"] = dates.dt.date.values[date_codes]
+
     #Add column day numbers
-    df["weekday"] = 99
+    df["weekday"] = weekdays[date_codes]
+
+    #Add column to indicate whether it is weekend
+    df["is_weekend"] = is_weekend[date_codes]
+
+    return df
+
+
+def datesAfter(dates, last_date):
+    """
+    This function checks which rows of the date column of a GVB file have a date after the given date. Each unique 
+    date string is parsed once (see transformDate).
+
+    Parameters:
+    - dates(series): Date column of an arrival or departure file ("Datum")
+    - last_date(Timestamp): Last date of the existing dataset (if None, all rows are kept)
+
+    Returns: Boolean array, True for the rows with a date after last_date (and rows of which the date can't be parsed)
+    """
+
+    if last_date is None:
+        return np.ones(len(dates), dtype=bool)
+
+    #Parse the unique date strings without AM/PM, missing dates are kept as a seperate value
+    date_codes, date_strings = pd.factorize(dates, use_na_sentinel=False)
+    parsed = pd.to_datetime(pd.Series(date_strings, dtype=object).str[:-3], format='%m/%d/%Y %H:%M:%S',
+                            errors="coerce").dt.normalize()
+
+    return ((parsed > last_date) | parsed.isna()).values[date_codes]
+
+
+def readDirectionData(path, station_col, hour_col, lat_col, lon_col, stations, chunk_size, last_date=None):
+    """
+    This function reads an arrival or departure file (reisdata GVB) in chunks. Only the columns used by stationData 
+    are read, with compact dtypes. Each chunk is reduced to the given stations and summed per date, hour and station, 
+    so the memory needed depends on the number of stations and hours instead of the size of the file.
+
+    Parameters:
+    - path(str): Path to the arrival or departure file
+    - station_col(str): Column that contains the station name
+    - hour_col(str): Column that contains the hour group
+    - lat_col(str): Column that contains the station latitude
+    - lon_col(str): Column that contains the station longitude
+    - stations(list): Which stations to include in the df
+    - chunk_size(int): Number of rows read per chunk
+    - last_date(Timestamp): If given, only the rows with a date after this date and the first row of each station 
+      are kept
+
+    Returns: DF with the summed passengers per date, hour and station, in the same format as the input file
+    """
+
+    #Variables
+
+    #Columns to group the passengers on
+    keys = ["Datum", hour_col, station_col]
+
+    #Columns needed by stationData and their dtypes, the passengers are read as a nullable integer because the files 
+    #contain empty fields (these are skipped by the sum)
+    dtypes = {"Datum": "category", hour_col: "category", station_col: "category",
+              lat_col: "float64", lon_col: "float64", "AantalReizen": "Int32"}
 
-    #Add whether column to indicate whether it is weekend
-    df["is_weekend"] = 0
+    #Summed passengers of all chunks read so far
+    totals = pd.DataFrame(columns=keys + ["AantalReizen"])
+
+    #Dicts to save the coordinates of the first row of each station
+    lat_dict = {}
+    lon_dict = {}
 
     #################################################################################
 
-    #Dataframe to Dict
-    df_dict = df.to_dict("index")
+    #Loop over the chunks of the file
+    for chunk in pd.read_csv(path, sep=";", usecols=list(dtypes), dtype=dtypes, chunksize=chunk_size):
+
+        #Select only the rows of the given stations
+        chunk = chunk[chunk[station_col].isin(stations)]
 
-    #Loop over dict
-    for k, v in df_dict.items():
+        #Keep the first row of stations that have not been seen before, so these stations are present with the same 
+        #coordinates as in a full read (the dates up to last_date are dropped by gvbDF)
+        first_row = ~chunk[station_col].duplicated().values & ~chunk[station_col].isin(list(lat_dict)).values
 
-        #Replace time string with time blok
-        time_blok = v["Hour"][:5]
-        time_blok = re.sub('[:]', '', time_blok)
-        v["Hour"] = int(time_blok)
+        #Save the coordinates of stations that have not been seen before
+        first_rows = chunk[first_row]
+        for station, lat, lon in zip(first_rows[station_col], first_rows[lat_col], first_rows[lon_col]):
+            lat_dict.setdefault(station, lat)
+            lon_dict.setdefault(station, lon)
 
-        #Replace 00:00 with 24:00 
-        if v["Hour"] == 0:
-            v["Hour"] = 2400
+        #Select only the dates after last_date and the first rows
+        chunk = chunk[datesAfter(chunk["Datum"], last_date) | first_row]
 
-        #Remove AM/PM from string
-        v["Date"] = v["Date"][:-3]
+        #Sum the passengers of the chunk and add them to the totals
+        partial = chunk.groupby(keys, observed=True)["AantalReizen"].sum().reset_index()
+        partial = partial.astype({col: str for col in keys})
 
-        try:
-            #Transform the date string to datatime.date object
-            date = pd.Timestamp.strptime(v["Date"], date_format_1)
+        totals = pd.concat([totals, partial]).groupby(
+            keys, sort=False)["AantalReizen"].sum().reset_index()
 
-            #Transfrom date to weekday number
-            v["weekday"] = date.weekday()
-        except:
-            #Transform the date string to datatime.date object
-            date = pd.Timestamp.strptime(v["Date"], date_format_2)
+    #################################################################################
+
+    #Add the coordinates of each station (the summed passengers contain no empty fields anymore)
+    totals["AantalReizen"] = totals["AantalReizen"].astype("int64")
+    totals[lat_col] = totals[station_col].map(lat_dict)
+    totals[lon_col] = totals[station_col].map(lon_dict)
+
+    return totals
+
+
+def readData(path, station_col, last_date=None):
+    """
+    This function reads an arrival or departure file (reisdata GVB) at once
 
-            #Transfrom date to weekday number
-            v["weekday"] = date.weekday()
+    Parameters:
+    - path(str): Path to the arrival or departure file
+    - station_col(str): Column that contains the station name
+    - last_date(Timestamp): If given, only the rows with a date after this date and the first row of each station 
+      are kept
 
-        #Transform Date string to datetime object
-        v["Date"] = date.date()
+    Returns: DF with the rows of the file
+    """
 
-        #Check if weekday is in the weekend
-        if date.weekday() == 5 or date.weekday() == 6:
-            v["is_weekend"] = 1
+    df = pd.read_csv(path, sep=";")
 
-        #Save the date object in the data column
-        v["Date"] = date.date()
+    #The first row of each station is kept, so each station is present with the same coordinates as in a full read 
+    #(the dates up to last_date are dropped by gvbDF)
+    first_row = ~df[station_col].duplicated().values
 
-    return pd.DataFrame.from_dict(df_dict, orient="index")
+    return df[datesAfter(df["Datum"], last_date) | first_row].reset_index(drop=True)
 
 
-def gvbDF(path_to_arr_data, path_to_dep_data, stations):
+def gvbDF(path_to_arr_data, path_to_dep_data, stations, chunk_size=None, cache_dir=None, last_date=None):
     """
     This function constructs the full GVB dataset, by calling on all needed functions
 
@@ -183,13 +267,31 @@ def gvbDF(path_to_arr_data, path_to_dep_data, stations):
     - path_to_arr_data(str): Path the arrival DF
     - path_to_dep_data(str): Path to dep df
     - stations(list): which stations to included in the DF
+    - chunk_size(int): If given, the files are streamed in chunks of this number of rows (see readDirectionData)
+    - cache_dir(str): Dir where the parsed input files are cached (if None, no cache is used)
+    - last_date(Timestamp): If given, only the dates after this date are read
 
     Returns: Full GVB DF
     """
 
-    #Import needed data
-    arr_df = pd.read_csv(path_to_arr_data, sep=";")
-    dep_df = pd.read_csv(path_to_dep_data, sep=";")
+    #Import needed data, last_date is part of the cache key
+    if chunk_size is None:
+        arr_df = cd.readCached(path_to_arr_data, lambda path: readData(path, "AankomstHalteNaam", last_date), 
+                               cache_dir, params=last_date)
+        dep_df = cd.readCached(path_to_dep_data, lambda path: readData(path, "VertrekHalteNaam", last_date), 
+                               cache_dir, params=last_date)
+    else:
+        #The streamed files only contain the given stations, so these are part of the cache key
+        arr_df = cd.readCached(path_to_arr_data, lambda path: readDirectionData(
+            path, "AankomstHalteNaam", "UurgroepOmschrijving (van aankomst)", "AankomstLat", "AankomstLon", stations,
+            chunk_size, last_date), cache_dir, params=[sorted(stations), last_date])
+        dep_df = cd.readCached(path_to_dep_data, lambda path: readDirectionData(
+            path, "VertrekHalteNaam", "UurgroepOmschrijving (van vertrek)", "VertrekLat", "VertrekLon", stations,
+            chunk_size, last_date), cache_dir, params=[sorted(stations), last_date])
+
+    #No dates after last_date in one of the files (the files always contain the first row of each station)
+    if not (datesAfter(arr_df["Datum"], last_date).any() and datesAfter(dep_df["Datum"], last_date).any()):
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]")})
 
     #Construct DF with passenger data per date on an hourly basis
     df = stationData(arr_df, dep_df, stations)
@@ -197,4 +299,8 @@ def gvbDF(path_to_arr_data, path_to_dep_data, stations):
     #Transform the date objects of the DF to a consistent format
     df = transformDate(df, stations)
 
-    return df
\ No newline at end of file
+    #Drop the dates up to last_date of the first rows of the stations
+    if last_date is not None:
+        df = df[pd.to_datetime(df["Date"]) > last_date].reset_index(drop=True)
+
+    return df
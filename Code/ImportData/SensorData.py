@@ -1,6 +1,9 @@
 #Imports 
 import pandas as pd
 
+#Import Functions other files
+import Code.ImportData.CacheData as cd
+
 def sensorCoordinates(coor_df, needed_sensors):
     """
     This function retrieves the Longitude and Latitude of the needed Sensors and returns these. 
@@ -9,45 +12,48 @@ def sensorCoordinates(coor_df, needed_sensors):
     - coor_df: DF with longitude and latitude of all the sensors in Amsterdam
     - needed_sensor: List with all the sensors from which the location must be retrieved
 
-    Returns: Dict[SensorName] : {"Longitude": <longitude>, "Latitude": <latitude>}
+    Returns: DF with the columns Sensor, SensorLongitude and SensorLatitude, one row per needed sensor
     """
 
-    #Variables
-
-    #Dict to saved the needed locations in
-    locations_dict = {}
+    #Save only the cameras with the object nummer given above
+    coor_df = coor_df[coor_df["Objectnummer"].isin(needed_sensors)]
 
-    #Select columns to use
-    coor_df = coor_df[["Objectnummer", "LNG", "LAT"]]
+    #Replace the "," with "." to make sure the coordinates can be turned into floats
+    locations_df = pd.DataFrame({"Sensor": coor_df["Objectnummer"].values,
+                                 "SensorLongitude": coor_df["LNG"].str.replace(",", ".", regex=False).astype(float).values,
+                                 "SensorLatitude": coor_df["LAT"].str.replace(",", ".", regex=False).astype(float).values})
 
-    #################################################################################
+    #If a sensor is present multiple times, the last given location is used
+    return locations_df.drop_duplicates("Sensor", keep="last").reset_index(drop=True)
 
-    #Change Df into dict (Needed for operations on data)
-    coor_dict = coor_df.to_dict("index")
 
-    for k, v in coor_dict.items():
+def sensorAliases(sensors, gaww_02, gaww_03):
+    """
+    This function replaces the alternate names of the gaww-02 and gaww-03 sensors with their sensor name
 
-        #Save only the cameras with the object nummer given above
-        if v["Objectnummer"] in needed_sensors:
+    Parameters:
+    - sensors (df[col]): sensor names
+    - gaww-02 (list): alternate names for the gaww-02 sensor
+    - gaww-03 (list): alternate names for the gaww-03 sensor
 
-            #Replace the "." with "," to make sure the coordinates can be turned into floats
-            v["LNG"] = float(v["LNG"].replace(",", "."))
-            v["LAT"] = float(v["LAT"].replace(",", "."))
+    Returns: df[col] with the sensor names
+    """
 
-            #Save all contents in seperate dict
-            locations_dict[v["Objectnummer"]] = {
-                "Longitude": v["LNG"], "Latitude": v["LAT"]}
+    #Mapping table from alternate name to sensor name
+    alias_dict = {alias: "GAWW-03" for alias in gaww_03}
+    alias_dict.update({alias: "GAWW-02" for alias in gaww_02})
 
-    return locations_dict
+    #Change camera names, names without alias are kept
+    return sensors.map(alias_dict).fillna(sensors)
 
 
-def sensorData(blip_df, locations_dict, needed_sensors, sensor_df, gaww_02, gaww_03):
+def sensorData(blip_df, locations_df, needed_sensors, sensor_df, gaww_02, gaww_03):
     """
     This function takes all the relevant sensor date and combines this in a single DF 
 
     Parameters:
     - blip_df (df): Constructed df from imported blip data
-    - locations_dict (dict): contains the longitude and latitude of the relevant sensors
+    - locations_df (df): contains the longitude and latitude of the relevant sensors
     - needed_sensors (list): selection of given relevant sensors
     - sensor_df (df): Custom made dataframe with subset sensor data
     - gaww-02 (list): alternate names for the gaww-02 sensor
@@ -58,79 +64,78 @@ def sensorData(blip_df, locations_dict, needed_sensors, sensor_df, gaww_02, gaww
 
     #################################################################################
 
-    #Group the counts of people per hour, per date, per camera
-    sensor_df = sensor_df.groupby(["richting", "datum", "uur"])[
-        "SampleCount"].sum().reset_index()
-
     #Rename the columns
     sensor_df = sensor_df.rename(index=str, columns={"richting": "Sensor", "datum": "Date", "uur": "Hour",
-                                                   "SampleCount": "CrowdednessCount"})
+                                                     "SampleCount": "CrowdednessCount"})
 
-    #Concatenate the two sensor DF's
-    sensor_df = pd.concat([sensor_df, blip_df],
-                         sort=True).reset_index().drop(columns={"index"})
+    #Change camera names and only save the sensors that are relevant
+    sensor_df["Sensor"] = sensorAliases(sensor_df["Sensor"], gaww_02, gaww_03)
+    sensor_df = sensor_df[sensor_df["Sensor"].isin(needed_sensors)]
 
-    #For the longitude number of the sensor
-    sensor_df.insert(3, "SensorLongitude", 0)
+    #Group the counts of people per hour, per date, per camera
+    sensor_df = sensor_df.groupby(["Sensor", "Date", "Hour"])[
+        "CrowdednessCount"].sum().reset_index()
 
-    #For the latitude number of the sensor
-    sensor_df.insert(4, "SensorLatitude", 0)
+    #Change camera names and only save the sensors that are relevant
+    blip_df = blip_df.assign(Sensor=sensorAliases(blip_df["Sensor"], gaww_02, gaww_03))
+    blip_df = blip_df[blip_df["Sensor"].isin(needed_sensors)]
 
-    #For the number of the day of the week
-    sensor_df.insert(3, "weekday", 99)
+    #Concatenate the two sensor DF's
+    sensor_df = pd.concat([sensor_df, blip_df[["Sensor", "Date", "Hour", "CrowdednessCount"]]],
+                          ignore_index=True)
 
     #################################################################################
 
-    #Change Df into dict
-    crowd_dict = sensor_df.to_dict("index")
+    #Transform the dates that are not a timestamp object yet
+    sensor_df["Date"] = pd.to_datetime(sensor_df["Date"], format="%Y-%m-%d")
 
-    #Loop over dict
-    for k, v in crowd_dict.items():
+    #Mulitply hour with 100 (Same structure as the other files), if the hour is 0, transform it to 2400
+    sensor_df["Hour"] = sensor_df["Hour"] * 100
+    sensor_df["Hour"] = sensor_df["Hour"].where(sensor_df["Hour"] != 0, 2400)
 
-        #Change camera name
-        if v["Sensor"] in gaww_02:
-            v["Sensor"] = "GAWW-02"
+    #Save the number of the day of the week
+    sensor_df["weekday"] = sensor_df["Date"].dt.weekday
 
-        #Change camera name
-        elif v["Sensor"] in gaww_03:
-            v["Sensor"] = "GAWW-03"
+    #Make the longitude and latitude consistent
+    sensor_df = pd.merge(sensor_df, locations_df, on="Sensor", how="left")
 
-        #Make the longitude and latitude consistent
-        if v["Sensor"] in needed_sensors:
+    #Sensors with counts but without coordinates would be dropped by the groupby below
+    missing = sorted(sensor_df.loc[sensor_df["SensorLatitude"].isna() | sensor_df["SensorLongitude"].isna(), 
+                                   "Sensor"].unique())
+    if missing:
+        raise KeyError("No coordinates found for the sensors: {0}".format(", ".join(missing)))
 
-            v["SensorLongitude"] = locations_dict[v["Sensor"]]["Longitude"]
-            v["SensorLatitude"] = locations_dict[v["Sensor"]]["Latitude"]
+    #################################################################################
 
-        #Mulitply hour with 100 (Same structure as the other files)
-        v["Hour"] *= 100
+    #Group the multiple different sensor data from same date and hour together
+    full_df = sensor_df.groupby(["Sensor", "Date", "Hour", "SensorLongitude",
+                                 "SensorLatitude", "weekday"])["CrowdednessCount"].sum().reset_index()
+    return full_df
 
-        #If the hour is 0, transform it to 2400
-        if v["Hour"] == 0:
-            v["Hour"] = 2400
 
-        #Save the number of the day of the week       
-        try:
-            v["weekday"] = v["Date"].weekday()
-        except:
-            #If the above code fails, the date is not timestamp object yet
-            v["Date"] = pd.Timestamp.strptime(v["Date"], "%Y-%m-%d")
-            v["weekday"] = v["Date"].weekday()
+def readSensorFile(path, reader, date_col, last_date=None):
+    """
+    This function reads a file with sensor counts and only keeps the rows with a date after the given date
 
-    #Return from Dict
-    full_df = pd.DataFrame.from_dict(crowd_dict, orient="index")
+    Parameters:
+    - path (str): path to the file
+    - reader (function): function that takes the path and returns the DF of the file
+    - date_col (str): column that contains the date ("%Y-%m-%d")
+    - last_date (Timestamp): last date of the existing dataset (if None, all rows are kept)
 
-    #################################################################################
+    Returns: DF with the rows of the file
+    """
 
-    #Only save the sensors that are relevant
-    full_df = full_df[full_df["Sensor"].isin(needed_sensors)]
+    df = reader(path)
 
-    #Group the multiple different sensor data from same date and hour together
-    full_df = full_df.groupby(["Sensor", "Date", "Hour", "SensorLongitude",
-                               "SensorLatitude", "weekday"])["CrowdednessCount"].sum().reset_index()
-    return full_df
+    if last_date is None:
+        return df
+
+    return df[pd.to_datetime(df[date_col], format="%Y-%m-%d") > last_date].reset_index(drop=True)
 
 
-def sensorDF(path_to_sensorData, path_to_coordinateData, path_to_blipData, needed_sensors, gaww_02, gaww_03):
+def sensorDF(path_to_sensorData, path_to_coordinateData, path_to_blipData, needed_sensors, gaww_02, gaww_03, cache_dir=None,
+             last_date=None):
 
     """
     Call on functions to construct full sensor df
@@ -142,20 +147,24 @@ def sensorDF(path_to_sensorData, path_to_coordinateData, path_to_blipData, neede
     - needed_sensors (list): selection of given relevant sensors
     - gaww-02 (list): alternate names for the gaww-02 sensor
     - gaww-03 (list): alternate names for the gaww-03 sensor
+    - cache_dir (str): dir where the parsed input files are cached (if None, no cache is used)
+    - last_date (Timestamp): if given, only the counts of the dates after this date are read
 
     Returns: DF with all relevant Sensor data
     """
 
-    #Import CSV file
-    sensor_df = pd.read_excel(path_to_sensorData)
-    coor_df = pd.read_csv(path_to_coordinateData, sep=";")
-    blip_df = pd.read_csv(path_to_blipData)
+    #Import CSV file, last_date is part of the cache key of the files with counts
+    sensor_df = cd.readCached(path_to_sensorData, lambda path: readSensorFile(path, pd.read_excel, "datum", last_date),
+                              cache_dir, params=last_date)
+    coor_df = cd.readCached(path_to_coordinateData, lambda path: pd.read_csv(path, sep=";"), cache_dir)
+    blip_df = cd.readCached(path_to_blipData, lambda path: readSensorFile(path, pd.read_csv, "Date", last_date),
+                            cache_dir, params=last_date)
 
     #Transform Sensor df
-    locations_dict = sensorCoordinates(coor_df, needed_sensors)
+    locations_df = sensorCoordinates(coor_df, needed_sensors)
 
     #Transform Crowdedness df
-    full_df = sensorData(blip_df, locations_dict,
+    full_df = sensorData(blip_df, locations_df,
                          needed_sensors, sensor_df, gaww_02, gaww_03)
 
     return full_df
\ No newline at end of file
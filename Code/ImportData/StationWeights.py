@@ -0,0 +1,147 @@
+#Imports
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+def saveScaler(scaler, filename):
+    """
+    This function saves the mean and scale of a fitted coordinate scaler as arrays, so the coordinates can be scaled
+    without sklearn (see scaleCoordinates)
+
+    Parameters:
+    - scaler (model/dict): fitted StandardScaler, or dict with the "mean" and "scale" arrays
+    - filename (str): where the scaler should be stored
+
+    Returns: Dict with the "mean" and "scale" arrays
+    """
+
+    if not isinstance(scaler, dict):
+        scaler = {"mean": np.asarray(scaler.mean_, dtype=float), "scale": np.asarray(scaler.scale_, dtype=float)}
+
+    pickle.dump(scaler, open(filename, 'wb'))
+
+    return scaler
+
+
+def loadScaler(filename):
+    """
+    This function imports a saved coordinate scaler (see saveScaler). Scalers saved as StandardScaler by earlier
+    versions are converted to the mean and scale arrays (importing these needs sklearn).
+
+    Parameters:
+    - filename (str): where the scaler is stored
+
+    Returns: Dict with the "mean" and "scale" arrays
+    """
+
+    scaler = pickle.load(open(filename, 'rb'))
+
+    if not isinstance(scaler, dict):
+        scaler = {"mean": np.asarray(scaler.mean_, dtype=float), "scale": np.asarray(scaler.scale_, dtype=float)}
+
+    return scaler
+
+
+def scaleCoordinates(values, scaler):
+    """
+    This function scales coordinates with a saved scaler, in the same way as StandardScaler.transform
+
+    Parameters:
+    - values (array): latitudes or longitudes, as a column
+    - scaler (dict): "mean" and "scale" arrays of the scaler (see loadScaler)
+
+    Returns: Array with the scaled coordinates, in the same shape as the given values
+    """
+
+    return (np.asarray(values, dtype=float) - scaler["mean"]) / scaler["scale"]
+
+
+def rbfKernel(x, y):
+    """
+    This function computes the rbf kernel between each row of x and each row of y, with gamma 1 / number of columns
+    (the default of sklearn.metrics.pairwise.rbf_kernel)
+
+    Parameters:
+    - x (array): first set of points, a row per point
+    - y (array): second set of points, a row per point
+
+    Returns: Array with a row per point of x and a column per point of y
+    """
+
+    distances = ((x[:, np.newaxis, :] - y[np.newaxis, :, :]) ** 2).sum(axis=2)
+
+    return np.exp(-distances / x.shape[1])
+
+
+def stationWeights(sensor_coordinates, station_coordinates, latscaler, lonscaler, weights_filename):
+    """
+    This function returns the matrix with rbf kernels between the scaled coordinates (latitude, longitude) of each
+    given sensor and station, computed in a single call. The matrix is saved, so weights of known sensors are reused
+    and only rows of new sensors (or sensors with a changed location) are computed. If the stations or scalers change,
+    the full matrix is computed again.
+
+    Parameters:
+    - sensor_coordinates (dict): latitude and longitude of each sensor
+    - station_coordinates (dict): latitude and longitude of each station
+    - latscaler (dict): scaler of the latitudes (see loadScaler)
+    - lonscaler (dict): scaler of the longitudes (see loadScaler)
+    - weights_filename (str): where the weight matrix should be stored
+
+    Returns: DF with a row per sensor and a "<station> weight" column per station
+    """
+
+    #Variables
+
+    #Columns of the weight matrix
+    columns = [station + " weight" for station in station_coordinates]
+
+    #Scaling of the coordinates, the saved weights are only valid for the same scaling
+    scaling = (float(latscaler["mean"][0]), float(latscaler["scale"][0]),
+               float(lonscaler["mean"][0]), float(lonscaler["scale"][0]))
+
+    #Saved weights, with the coordinates of the sensor of each row
+    weights = pd.DataFrame(columns=["SensorLatitude", "SensorLongitude"] + columns, dtype=float)
+
+    #################################################################################
+
+    #Import the saved weights, only usable if computed for the same stations and scaling
+    if os.path.isfile(weights_filename):
+        saved = pickle.load(open(weights_filename, 'rb'))
+
+        if saved.get("scaling") == scaling and saved["stations"] == station_coordinates:
+            weights = saved["weights"]
+
+    #Select the sensors that are not in the saved weights
+    new_sensors = [sensor for sensor, coordinates in sensor_coordinates.items() if sensor not in weights.index or
+                   (weights.at[sensor, "SensorLatitude"], weights.at[sensor, "SensorLongitude"]) != coordinates]
+
+    #Calculate the weights of all new sensors at once and save them
+    if new_sensors:
+        sensor_array = np.array([sensor_coordinates[sensor] for sensor in new_sensors], dtype=float).reshape(-1, 2)
+        station_array = np.array(list(station_coordinates.values()), dtype=float).reshape(-1, 2)
+
+        #Scale the latitudes and longitudes, so both contribute to the distance
+        x = np.column_stack([scaleCoordinates(sensor_array[:, [0]], latscaler),
+                             scaleCoordinates(sensor_array[:, [1]], lonscaler)])
+        y = np.column_stack([scaleCoordinates(station_array[:, [0]], latscaler),
+                             scaleCoordinates(station_array[:, [1]], lonscaler)])
+
+        new_weights = pd.DataFrame(rbfKernel(x, y), index=new_sensors, columns=columns)
+        new_weights.insert(0, "SensorLatitude", sensor_array[:, 0])
+        new_weights.insert(1, "SensorLongitude", sensor_array[:, 1])
+
+        weights = pd.concat([weights.drop(index=new_sensors, errors="ignore"), new_weights])
+
+        pickle.dump({"stations": station_coordinates, "scaling": scaling, "weights": weights},
+                    open(weights_filename, 'wb'))
+
+    weights = weights.loc[list(sensor_coordinates), columns]
+
+    #Constant weights carry no information, which happens if the coordinates are swapped or missing
+    values = weights.values.astype(float)
+    if values.size > 1 and (np.isnan(values).any() or np.ptp(values) == 0):
+        raise ValueError("The station weights are constant or missing, check the coordinates of the sensors and "
+                         "stations")
+
+    return weights
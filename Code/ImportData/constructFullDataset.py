@@ -3,12 +3,54 @@ import json
 import pandas as pd
 import re
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 #Import Functions other files
 import Code.ImportData.CombineData as cmd 
 import Code.ImportData.EventData as evd 
 import Code.ImportData.GVBData as gvb 
 import Code.ImportData.SensorData as sd 
+import Code.ImportData.DatasetStorage as dst
+
+def buildSources(builders, workers):
+    """
+    This function constructs the given source datasets. If more than one worker is given, the datasets are constructed 
+    at the same time in seperate processes.
+
+    Parameters:
+    - builders (dict): per dataset name, the function that constructs the dataset and the arguments of that function
+    - workers (int): number of processes used to construct the datasets
+
+    Returns: Dict with the constructed dataset per dataset name
+    """
+
+    #Dict to save the constructed datasets in
+    sources = {}
+
+    #Construct the datasets one after another
+    if workers <= 1:
+        for name, (builder, args) in builders.items():
+            try:
+                sources[name] = builder(*args)
+            except Exception as e:
+                raise RuntimeError("Constructing the {0} dataset failed: {1}".format(name, e)) from e
+
+        return sources
+
+    #################################################################################
+
+    #Construct the datasets in a process pool
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(builder, *args) for name, (builder, args) in builders.items()}
+
+        for name, future in futures.items():
+            try:
+                sources[name] = future.result()
+            except Exception as e:
+                raise RuntimeError("Constructing the {0} dataset failed: {1}".format(name, e)) from e
+
+    return sources
+
 
 def constructDF(input_dict, output_dict, params_dict):
     """
@@ -19,24 +61,51 @@ def constructDF(input_dict, output_dict, params_dict):
     - output_dict (dict): all paths of where output files should be saved
     - params_dict (dict): all general hyperparameters that can be changed by user
 
-    Returns: CSV files with all needed data, saved at specified output dir
+    Returns: Dataset with all needed data, saved at specified output dir. If update_data is set, only the dates 
+    after the last date of the existing dataset are added to it.
     """
 
-    #Constructs the sensor datast
-    sensor_df = sd.sensorDF(input_dict["sensorData"],input_dict["coordinateData"], input_dict["blipData"], params_dict["needed_sensors"],
-                            params_dict["gaww_02"], params_dict["gaww_03"])
+    #Dir where the parsed input files are cached
+    if params_dict["cache_input"]:
+        cache_dir = output_dict["cache"]
+    else:
+        cache_dir = None
 
-    #Constructs the GVB dataset and dataset with all average passenger counts
-    gvb_df = gvb.gvbDF(
-        input_dict["arrData"], input_dict["deppData"], params_dict["stations"])
+    #Last date of the existing dataset, only the dates after this date are constructed and added
+    if params_dict["update_data"]:
+        last_date = dst.lastDate(output_dict, params_dict)
+    else:
+        last_date = None
 
-    #Constructs the event dataset
-    event_df = evd.eventDF(input_dict["eventData"], params_dict["lon_min"], params_dict["lon_max"], 
-                           params_dict["lat_min"], params_dict["lat_max"])
+    #Functions and arguments to construct the source datasets, in update mode the dates up to last_date are dropped 
+    #while the input files are read
+    builders = {
+        #Constructs the sensor datast
+        "sensor": (sd.sensorDF, (input_dict["sensorData"], input_dict["coordinateData"], input_dict["blipData"], 
+                                 params_dict["needed_sensors"], params_dict["gaww_02"], params_dict["gaww_03"], cache_dir,
+                                 last_date)),
+
+        #Constructs the GVB dataset and dataset with all average passenger counts
+        "GVB": (gvb.gvbDF, (input_dict["arrData"], input_dict["deppData"], params_dict["stations"], 
+                            params_dict["gvb_chunk_size"], cache_dir, last_date)),
+
+        #Constructs the event dataset
+        "event": (evd.eventDF, (input_dict["eventData"], params_dict["lon_min"], params_dict["lon_max"],
+                                params_dict["lat_min"], params_dict["lat_max"], cache_dir, last_date))
+    }
+
+    #Construct the source datasets
+    sources = buildSources(builders, params_dict["source_workers"])
     
     #Combines previous constructed datasets
-    full_df = cmd.fullDF(sensor_df, gvb_df, event_df,
-                         params_dict["stations"], output_dict["lat_scaler"], output_dict["lon_scaler"])
+    full_df = cmd.fullDF(sources["sensor"], sources["GVB"], sources["event"],
+                         params_dict["stations"], output_dict["lat_scaler"], output_dict["lon_scaler"],
+                         output_dict["station_weights"], last_date)
+
+    #Saves DF as parquet or CSV
+    if last_date is None:
+        dst.saveDataset(full_df, output_dict, params_dict)
 
-    #Saves DF as CSV
-    full_df.to_csv(output_dict["full_df"], index=False)
\ No newline at end of file
+    #Append the new dates to the existing dataset
+    elif full_df is not None:
+        dst.saveDataset(full_df, output_dict, params_dict, append=True)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+from contextlib import contextmanager
+from joblib import cpu_count
+from threadpoolctl import threadpool_limits
+
+#Environment variables that set the number of threads of the BLAS/OpenMP thread pools
+thread_vars = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+               "NUMEXPR_NUM_THREADS"]
+
+def cpuBudget(params_dict):
+    """
+    This function returns the total number of cores the models may use
+
+    Parameters:
+    - params_dict (dict): all general hyperparameters that can be changed by user
+
+    Returns: Number of cores, all available cores if not set
+    """
+
+    return params_dict["cpu_budget"] or cpu_count()
+
+
+def cpuSchedule(params_dict, n_tasks, n_models=1):
+    """
+    This function splits the core budget over the processes of the hyperparameter search and the threads each model
+    may use, so the number of busy threads never exceeds the budget. If multiple models are constructed at the same
+    time, each model gets an equal share of the budget.
+
+    Parameters:
+    - params_dict (dict): all general hyperparameters that can be changed by user
+    - n_tasks (int): number of model fits of the search that can run at the same time
+    - n_models (int): number of models constructed at the same time
+
+    Returns: Dict with the number of search processes ("workers") and threads per model ("threads")
+    """
+
+    #Share of the cores for this model
+    budget = max(1, cpuBudget(params_dict) // n_models)
+
+    #Number of search processes, by default one per fit until the budget is used
+    workers = params_dict["search_workers"] or n_tasks
+    workers = max(1, min(workers, n_tasks, budget))
+
+    #The remaining cores are divided over the threads of the models in each process
+    return {"workers": workers, "threads": max(1, budget // workers)}
+
+
+@contextmanager
+def cpuLimits(resources):
+    """
+    This function limits the thread pools to the scheduled number of threads per model. The BLAS/OpenMP thread pools
+    of this process are limited directly. The search processes read the limits from the environment variables when
+    they start.
+
+    Parameters:
+    - resources (dict): scheduled processes and threads (see cpuSchedule)
+    """
+
+    #Save the current environment variables, so they can be restored afterwards
+    saved_env = {var: os.environ.get(var) for var in thread_vars}
+    os.environ.update({var: str(resources["threads"]) for var in thread_vars})
+
+    try:
+        with threadpool_limits(limits=resources["threads"]):
+            yield
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
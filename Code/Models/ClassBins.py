@@ -0,0 +1,68 @@
+import pandas as pd
+import numpy as np
+
+#Quantiles that split the crowdedness counts into the 4 classes
+class_quantiles = [.25, .5, .75]
+
+def classBins(counts, quantiles=class_quantiles):
+    """
+    This function computes the edges between the crowdedness classes, the quantiles taken over all the counts. The
+    counts can be given as one column, or as an iterable of chunks (e.g. read per file or per partition) for datasets
+    that don't fit in memory. Of each chunk, only the number of times each count occurs is kept, so the memory used
+    depends on the number of unique counts instead of the number of rows. The edges are the same as the quantiles of
+    the full column (linear interpolation between the two nearest counts).
+
+    Parameters:
+    - counts (series/array/iterable): crowdedness counts, or chunks of crowdedness counts
+    - quantiles (list): quantiles that split the classes
+
+    Returns: Array with the bin edges
+    """
+
+    if isinstance(counts, (pd.Series, np.ndarray)):
+        counts = [counts]
+
+    #Number of times each count occurs, summed over all chunks (missing counts are skipped)
+    totals = pd.Series(dtype=np.int64)
+    for chunk in counts:
+        totals = totals.add(pd.Series(np.asarray(chunk, dtype=np.float64)).value_counts(), fill_value=0)
+
+    if totals.empty:
+        raise ValueError("No crowdedness counts to compute the class bins from")
+
+    totals = totals.sort_index()
+    values = totals.index.to_numpy(dtype=np.float64)
+    last_rank = np.cumsum(totals.to_numpy(dtype=np.int64))
+
+    #Position of each quantile in the sorted counts, and the counts at the two nearest positions
+    positions = (last_rank[-1] - 1) * np.asarray(quantiles, dtype=np.float64)
+    lower = np.floor(positions)
+    low_values = values[np.searchsorted(last_rank, lower, side="right")]
+    high_values = values[np.searchsorted(last_rank, np.minimum(lower + 1, last_rank[-1] - 1), side="right")]
+
+    return low_values + (positions - lower) * (high_values - low_values)
+
+
+def assignClasses(counts, bin_edges):
+    """
+    This function converts numerical crowdedness counts (measured or predicted) into classes 1 to 4. A count below the
+    first edge is class 1, a count equal to or above the last edge is class 4.
+
+    Parameters:
+    - counts (series/array): crowdedness counts
+    - bin_edges (array): edges between the classes (see classBins)
+
+    Returns: Array with the classes, missing counts stay missing
+    """
+
+    values = np.asarray(counts, dtype=np.float64)
+
+    #Number of edges equal to or below each count
+    classes = np.searchsorted(np.asarray(bin_edges, dtype=np.float64), values, side="right") + 1
+
+    missing = np.isnan(values)
+    if missing.any():
+        print(int(missing.sum()), " crowdedness counts have no class, as they are missing")
+        return np.where(missing, np.nan, classes)
+
+    return classes.astype(np.int8)
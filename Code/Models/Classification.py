@@ -1,145 +1,129 @@
-from sklearn.model_selection import RandomizedSearchCV
 from sklearn.metrics import precision_score
 from sklearn.metrics import recall_score
 from sklearn.metrics import accuracy_score
 from sklearn.metrics import f1_score
-import pickle
+from sklearn.metrics import get_scorer
+from functools import partial
 import matplotlib.pyplot as plt
 import pandas as pd
 
-def hyperParameter(x_train, y_train, score, model, model_name, cycles, params):
+from Code.Models.CrossValidation import searchCV, fitSearch, searchCost
+from Code.Models.ModelArtifacts import saveModel
+from Code.Models.XGBoostModels import searchFitParams
+
+def foldScores(estimator, x, y, score, labels):
+    """
+    This function scores the classification model on the test rows of one split. Used as scoring function of the 
+    hyperparameter search, so the scores of the best parameters can be reused as training scores.
+
+    Parameters:
+    - estimator (model): model trained on the train rows of the split
+    - x (array/df): test features of the split
+    - y (array): test target of the split
+    - score (str): scoring metric used to find the best model
+    - labels (list): all class labels
+
+    Returns: Dict with the scoring metric, accuracy, and the precision, recall and f1 score per label of the split
+    """
+
+    y_pred_model = estimator.predict(x)
+
+    scores = {"score": get_scorer(score)(estimator, x, y), "accuracy": accuracy_score(y, y_pred_model)}
+
+    #Calculate precision, recall and f1 score per label
+    for name, metric in [("precision", precision_score), ("recall", recall_score), ("f1", f1_score)]:
+        for label, value in zip(labels, metric(y, y_pred_model, labels=labels, average=None)):
+            scores["{0}_{1}".format(name, label)] = value
+
+    return scores
+
+
+def hyperParameter(train, score, model, model_name, cycles, resources, labels, params, search={"strategy": "random"}):
     """
-    This function fits multiple hyperparameters to find the optimal combinationf.
+    This function fits multiple hyperparameters to find the optimal combination. All combinations are tested on the
+    given splits of the training dates, and the best combination is trained on the full training set.
 
     Parameters:
-    - x_train (df): training feature set model
-    - y_train (df): training target set model
+    - train (tuple): training set sorted on date, with the rows of each split (see CrossValidation.foldMatrices)
     - score (str): scoring metric used to find the best model 
     - model (model): model that needs to be evaluated
     - model_name (str): unique ID model
     - cycles (int): number of iterations to test the model
+    - resources (dict): number of search processes and threads per model (see CPUBudget.cpuSchedule)
+    - labels (list): all class labels
     - params (dict): optimal model hyperparameters
+    - search (dict): search strategy settings (see CrossValidation.searchCV)
 
     Returns:
     - Dict with the optimal combination of parameters
     - Score of the best model
+    - Search results of all combinations
+    - Best model, trained on the full training set
     """
 
+    #If model is baseline, don't include random state/n_jobs parameter
+    if model_name != "dc":
+        model.set_params(random_state=42, n_jobs=resources["threads"])
+
+    #Training set sorted on date, with the rows of each split
+    x, y, columns, cv, dates = train
+
+    ## XGB Classifier model only takes values as input, the DF of the other models doesn't copy the matrix
+    if model_name != "xgbc":
+        x = pd.DataFrame(x, columns=columns, copy=False)
+
     #Call on the the hyper parameter fitting modle
-    hyp = RandomizedSearchCV(estimator=model, param_distributions=params, n_iter=cycles, scoring=score, n_jobs=-1, cv=10,
-                             refit=score, random_state=42)
+    hyp = searchCV(model, params, cycles, partial(foldScores, score=score, labels=labels), resources["workers"], cv, search)
 
-    #Run hyper parameter fitting
-    ## XGB Classifier model only takes values as input
+    #Run hyper parameter fitting, XGB models hold out the last dates of each split for early stopping and reuse the 
+    #quantized matrices of each split
     if model_name == "xgbc":
-        model = hyp.fit(x_train.drop(
-            columns={"Date"}).values, y_train["CrowdednessCount"].values)
+        model = fitSearch(hyp, x, y, resources, **searchFitParams(dates))
     else:
-        model = hyp.fit(x_train.drop(
-            columns={"Date"}), y_train["CrowdednessCount"])
+        model = fitSearch(hyp, x, y, resources)
+
+    #Parameters of the best model
+    best_params = dict(model.best_params_)
+    if model_name != "dc":
+        best_params.update(random_state=42, n_jobs=resources["threads"])
 
-    return model.best_params_, model.best_score_
+    return best_params, model.best_score_, model, model.best_estimator_
 
-def trainModel(model, x_train, y_train, kf, train_dates, labels, params, model_name, kf_size):
+def trainScores(hyp, labels, model_name):
     """
-    This function trains the classification model with optimal parameters
+    This function returns the mean scores of the best parameters over the k splits of the hyperparameter search
 
     Parameters:
-    - model (model): model that needs to be trained
-    - x_train (df): training features set model
-    - y_train (df): training target set model
-    - train_dates (list): all dates in the training set
+    - hyp (model): fitted hyperparameter search
     - labels (list): all class labels
-    - params (dict): optimal model hyperparameters
     - model_name (str): unique ID model
-    - kf_size (int): number of splits in KFolds
 
     Returns:
     - mean_acc: Mean Accuracy
     - prec_dict: Mean Precision per class
     - rec_dict: Mean Recall per class
     - f1_dict: Mean F1-Score per class
-    - model: Trained model
     """
 
-    #If model is baseline, don't include random state/n_jobs parameter
-    if model_name == "dc":
-        model.set_params(**params)
-    else:
-        model.set_params(**params)
-        params["random_state"] = 42
-        params["n_jobs"] = -1
+    #Mean score of the best parameters
+    def meanScore(name):
+        return hyp.cv_results_["mean_test_" + name][hyp.best_index_]
 
-    #Variables
-    mean_acc = 0
-    mean_precision = 0
-    mean_recall = 0
-    mean_f1_score = 0
+    mean_acc = round(meanScore("accuracy") * 100, 2)
 
     #Dict to save the metric scores
     prec_dict = {}
     rec_dict = {}
     f1_dict = {}
 
-    #Split the train dates into train and test, kf_size times
-    for train_index, test_index in kf.split(train_dates):
-
-        #Select rows dataset based on the dates in train_index
-        ## XGB Classifier model only takes values as input
-        if model_name == "xgbc":
-            x = x_train[x_train["Date"].isin(
-                train_dates[train_index])].drop(columns={"Date"}).values
-            y = y_train[y_train["Date"].isin(
-                train_dates[train_index])]["CrowdednessCount"].values 
-        else: 
-            x = x_train[x_train["Date"].isin(
-                train_dates[train_index])].drop(columns={"Date"})
-            y = y_train[y_train["Date"].isin(
-                train_dates[train_index])]["CrowdednessCount"]
-
-        #Fit the model
-        model.fit(x, y)
-
-        #Select rows dataset based on dates in test_index 
-        ## XGB Classifier model only takes values as input
-        if model_name == "xgbc":
-            x_test = x_train[x_train["Date"].isin(
-                train_dates[test_index])].drop(columns={"Date"}).values
-            y_test = y_train[y_train["Date"].isin(
-                train_dates[test_index])]["CrowdednessCount"].values
-        else: 
-            x_test = x_train[x_train["Date"].isin(
-                train_dates[test_index])].drop(columns={"Date"})
-            y_test = y_train[y_train["Date"].isin(
-                train_dates[test_index])]["CrowdednessCount"]
-
-        #Make predictions
-        y_pred_model = model.predict(x_test)
-
-        #If model is baseline, only calculate accraucy
-        if model_name == "dc":
-            mean_acc += accuracy_score(y_test, y_pred_model)
-        else:
-            #Calculate precision, recall and f1 score per label and accuracy of entire set
-            mean_acc += accuracy_score(y_test, y_pred_model)
-            mean_precision += precision_score(y_test, y_pred_model, average=None)
-            mean_recall += recall_score(y_test, y_pred_model, average=None)
-            mean_f1_score += f1_score(y_test, y_pred_model, average=None)
-
-    #Take the mean score over all 10 iterations
-    mean_acc = round(((mean_acc / kf_size) * 100), 2)
-    mean_precision = (mean_precision / kf_size) * 100
-    mean_recall = (mean_recall / kf_size) * 100
-    mean_f1_score = (mean_f1_score / kf_size) * 100
-
-    #Return the precision, recall, and f1score in seperate dicts
+    #If model is baseline, only return the accuracy
     if model_name != "dc":
-        for i in range(len(labels)):
-            prec_dict["{0}".format(labels[i])] = mean_precision[i]
-            rec_dict["{0}".format(labels[i])] = mean_recall[i]
-            f1_dict["{0}".format(labels[i])] = mean_f1_score[i]
+        for label in labels:
+            prec_dict["{0}".format(label)] = meanScore("precision_{0}".format(label)) * 100
+            rec_dict["{0}".format(label)] = meanScore("recall_{0}".format(label)) * 100
+            f1_dict["{0}".format(label)] = meanScore("f1_{0}".format(label)) * 100
 
-    return mean_acc, prec_dict, rec_dict, f1_dict, model
+    return mean_acc, prec_dict, rec_dict, f1_dict
 
 def evalModel(model, x_eval, y_eval, labels, plot_dir, model_name):
     """
@@ -192,8 +176,8 @@ def evalModel(model, x_eval, y_eval, labels, plot_dir, model_name):
     return acc, prec_dict, rec_dict, f1_dict
 
 
-def modelConstruction(model_dir, plot_dir, model_name, model, labels, x_train, y_train, x_eval, y_eval, score, train_dates, kf, cycles, params, kf_size, 
-                      remove_sensor):
+def modelConstruction(model_dir, plot_dir, model_name, model, labels, train, x_eval, y_eval, score, cycles, params, 
+                      remove_sensor, resources={"workers": 1, "threads": 1}, search={"strategy": "random"}, compression=0):
     """
     This function trains a linear regression model
 
@@ -203,17 +187,16 @@ def modelConstruction(model_dir, plot_dir, model_name, model, labels, x_train, y
     - model_name (str): name of the model
     - model (model): model that needs to be evaluated
     - labels (list): class labels
-    - x_train (df): training feature set model
-    - y_train (df): training target set model
+    - train (tuple): training set sorted on date, with the rows of each split (see CrossValidation.foldMatrices)
     - x_eval (df): test features set model
     - y_eval (df): test target set model
     - score (str): sklearn standard scoring metric used by model
-    - train_dates (list): dates present in training model 
-    - kf (model): used to split training dates into training and test k times
     - cycles (int): number of iterations to test the model
     - visualization (bool): whether you want a scatter model of evaluation results
     - params: dict with optimal model hyperparameters
-    - kf_size (int): number of splits in KFolds
+    - resources (dict): number of search processes and threads per model (see CPUBudget.cpuSchedule)
+    - search (dict): search strategy settings (see CrossValidation.searchCV)
+    - compression (int): compression level of the saved model, 0 saves it uncompressed (see ModelArtifacts.saveModel)
 
     Returns: Dict containing all metrics of hyperparameter, training and evaluation of the model
     """
@@ -222,14 +205,18 @@ def modelConstruction(model_dir, plot_dir, model_name, model, labels, x_train, y
     results_dict = {}
 
     #Hyper parameter tuning
-    best_params, best_score = hyperParameter(
-        x_train, y_train, score, model, model_name, cycles, params)
+    best_params, best_score, hyp, model = hyperParameter(
+        train, score, model, model_name, cycles, resources, labels, params, search)
     results_dict["Hyper R2 Score"] = best_score
     results_dict["Model Parameters"] = best_params
+    results_dict.update(searchCost(hyp))
+
+    #Number of trees used by XGB models with early stopping
+    if hasattr(model, "best_iteration_"):
+        results_dict["Best Iteration"] = model.best_iteration_ + 1
 
-    #Train the model
-    train_acc, train_prec, train_rec, train_f1, model = trainModel(
-        model, x_train, y_train, kf, train_dates, labels, best_params, model_name, kf_size)
+    #The scores of the best parameters on the k splits are the training scores
+    train_acc, train_prec, train_rec, train_f1 = trainScores(hyp, labels, model_name)
 
     #Save results training
     results_dict["Train Accuracy Score"] = train_acc
@@ -247,12 +234,12 @@ def modelConstruction(model_dir, plot_dir, model_name, model, labels, x_train, y
     results_dict["Evaluation Recall Score"] = eval_rec
     results_dict["Evaluation F1 Score"] = eval_f1
 
-    #Save model as pickle
+    #Save model (see ModelArtifacts.saveModel)
     if remove_sensor:
         filename = "{0}{1}_model_generalize.sav".format(model_dir, model_name)
     else:
         filename = "{0}{1}_model.sav".format(model_dir, model_name)
     
-    pickle.dump(model, open(filename, 'wb'))
+    saveModel(model, filename, compression)
 
     return results_dict
@@ -0,0 +1,140 @@
+import numpy as np
+from sklearn.experimental import enable_halving_search_cv
+from sklearn.model_selection import RandomizedSearchCV, HalvingRandomSearchCV
+
+from Code.Models.TrainTestSplit import dateIndex, foldRows
+from Code.Models.ForestSearch import WarmStartForestSearch
+from Code.Models.CPUBudget import cpuLimits
+
+def foldPlan(kf, train_dates):
+    """
+    This function splits the train dates k times. The same splits are used by all models, during both the
+    hyperparameter search and the training scores.
+
+    Parameters:
+    - kf (model): used to split training dates into training and test k times
+    - train_dates (list): dates present in training model
+
+    Returns: List with the train dates and test dates of each split
+    """
+
+    return [(train_dates[train_index], train_dates[test_index])
+            for train_index, test_index in kf.split(train_dates)]
+
+
+def foldMatrices(x_train, y_train, folds):
+    """
+    This function sorts the training set on date once and converts it to a single feature matrix and target array.
+    The splits are translated to the rows of their dates, so all rows of a date are always in the same split. The 
+    matrices are built once per model family and saved to the file that all models read (see models.constructModel).
+
+    Parameters:
+    - x_train (df): training features model
+    - y_train (df): training target model
+    - folds (list): train dates and test dates of each split (see foldPlan)
+
+    Returns:
+    - x (array): feature matrix, sorted on date
+    - y (array): target array, sorted on date
+    - columns (list): names of the features
+    - cv (list): train rows and test rows of each split
+    - dates (array): date of each row, sorted
+    """
+
+    date_index = dateIndex(x_train)
+
+    x = x_train.iloc[date_index["order"]].drop(columns={"Date"})
+    columns = list(x.columns)
+    x = x.to_numpy(dtype=np.float64)
+    y = y_train.iloc[date_index["order"]]["CrowdednessCount"].to_numpy()
+
+    cv = [(foldRows(date_index, fold_train_dates), foldRows(date_index, fold_test_dates))
+          for fold_train_dates, fold_test_dates in folds]
+
+    dates = x_train["Date"].to_numpy()[date_index["order"]]
+
+    return x, y, columns, cv, dates
+
+
+def searchCV(model, params, cycles, scoring, workers, cv, search):
+    """
+    This function constructs the hyperparameter search of a model. With the "random" strategy, all combinations are 
+    tested on the full training set. With the "warm_start" strategy (forest models only), one forest is grown per
+    combination of the other parameters and scored at every n_estimators option. With the "halving" strategy (successive halving), all combinations start on a
+    small budget, and only the best 1/factor of the combinations are tested again on a factor times larger budget,
+    until the full budget is reached. The budget is either the number of trees ("n_estimators") or the number of
+    training rows ("n_samples").
+
+    Parameters:
+    - model (model): model that needs to be evaluated
+    - params (dict): parameters to tune, with their options
+    - cycles (int): number of combinations to test
+    - scoring (function): scoring function of the search
+    - workers (int): number of processes used to test the combinations
+    - cv (list): train rows and test rows of each split
+    - search (dict): search settings of the model, with the "strategy", and for "halving" the "resource" and "factor"
+
+    Returns: Hyperparameter search
+    """
+
+    #Random search
+    if search["strategy"] == "random":
+        return RandomizedSearchCV(estimator=model, param_distributions=params, n_iter=cycles, scoring=scoring,
+                                  n_jobs=workers, cv=cv, refit="score", random_state=42)
+
+    #Forest grown with warm start, scored at every number of trees
+    if search["strategy"] == "warm_start":
+        return WarmStartForestSearch(estimator=model, param_distributions=params, n_iter=cycles, scoring=scoring,
+                                     n_jobs=workers, cv=cv, refit="score", random_state=42)
+
+    #Successive halving, the full budget of the number of trees is the largest number of trees in the options
+    if search["resource"] == "n_estimators":
+        params = dict(params)
+        max_resources = max(params.pop("n_estimators", [model.get_params()["n_estimators"]]))
+    else:
+        max_resources = "auto"
+
+    return HalvingRandomSearchCV(estimator=model, param_distributions=params, n_candidates=cycles, scoring=scoring,
+                                 n_jobs=workers, cv=cv, refit="score", random_state=42, 
+                                 resource=search["resource"], factor=search["factor"], max_resources=max_resources,
+                                 min_resources="exhaust", return_train_score=False)
+
+
+def fitSearch(hyp, x, y, resources, **fit_params):
+    """
+    This function runs the hyperparameter search within the scheduled processes and threads. The feature matrix is 
+    memory mapped from the split file of the model (see models.constructModel), so the search processes get the path 
+    of this file instead of a copy of the matrix.
+
+    Parameters:
+    - hyp (model): hyperparameter search (see searchCV)
+    - x (array/df): feature matrix, sorted on date
+    - y (array): target array, sorted on date
+    - resources (dict): number of search processes and threads per model (see CPUBudget.cpuSchedule)
+    - fit_params: other arguments of the fit of the search (e.g. the dates of the rows for XGB models)
+
+    Returns: Fitted hyperparameter search
+    """
+
+    with cpuLimits(resources):
+        return hyp.fit(x, y, **fit_params)
+
+
+def searchCost(hyp):
+    """
+    This function returns the compute spent by a fitted hyperparameter search
+
+    Parameters:
+    - hyp (model): fitted hyperparameter search
+
+    Returns: Dict with the number of model fits and the total fit time in seconds, including the final fit of the best model
+    """
+
+    n_splits = hyp.n_splits_
+
+    #Each candidate is fitted on every split, except in the warm start search where the candidates with a different
+    #number of trees share one forest (see ForestSearch.WarmStartForestSearch)
+    n_fits = getattr(hyp, "n_fits_", len(hyp.cv_results_["params"]) * n_splits)
+
+    return {"Search Fits": n_fits + 1,
+            "Search Fit Time": float(np.sum(hyp.cv_results_["mean_fit_time"]) * n_splits + hyp.refit_time_)}
@@ -0,0 +1,117 @@
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler
+
+def sweepFold(model, params, checkpoints, x, y, train_rows, test_rows, scoring):
+    """
+    This function grows one forest on the train rows of a split and scores it at each number of trees. With
+    warm_start, each fit only adds the missing trees to the forest, so the sweep costs as much as the largest forest.
+
+    Parameters:
+    - model (model): forest model that needs to be evaluated
+    - params (dict): parameters of the forest, without n_estimators
+    - checkpoints (list): numbers of trees at which the forest is scored, sorted
+    - x (array/df): features of the training set
+    - y (array): target of the training set
+    - train_rows (array): rows used to train the forest
+    - test_rows (array): rows used to score the forest
+    - scoring (function): scoring function returning a dict with the scores
+
+    Returns: List with per number of trees the scores and the time spent on adding the trees
+    """
+
+    model = clone(model).set_params(warm_start=True, **params)
+
+    #Select the rows of the split
+    if hasattr(x, "iloc"):
+        x_fold, x_test = x.iloc[train_rows], x.iloc[test_rows]
+    else:
+        x_fold, x_test = x[train_rows], x[test_rows]
+    y_fold, y_test = y[train_rows], y[test_rows]
+
+    results = []
+    for n_estimators in checkpoints:
+        start = time.perf_counter()
+        model.set_params(n_estimators=n_estimators).fit(x_fold, y_fold)
+        fit_time = time.perf_counter() - start
+
+        results.append((scoring(model, x_test, y_test), fit_time))
+
+    return results
+
+
+class WarmStartForestSearch:
+    """
+    Hyperparameter search for forest models. For each sampled combination of the other parameters, one forest is grown
+    per split up to the largest n_estimators option and scored at every n_estimators option on the way. The fitted
+    search has the same result attributes as the sklearn searches used by the other models.
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter, scoring, n_jobs, cv, refit="score", random_state=None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.cv = cv
+        self.refit = refit
+        self.random_state = random_state
+
+    def fit(self, x, y):
+        """
+        This function runs the search and trains the best combination on the full training set
+
+        Parameters:
+        - x (array/df): features of the training set
+        - y (array): target of the training set
+
+        Returns: The fitted search
+        """
+
+        #Numbers of trees to score, and combinations of the other parameters
+        params = dict(self.param_distributions)
+        checkpoints = sorted(set(params.pop("n_estimators", [self.estimator.get_params()["n_estimators"]])))
+        combinations = list(ParameterSampler(params, n_iter=self.n_iter, random_state=self.random_state))
+
+        #Grow the forests of all combinations and splits
+        n_splits = len(self.cv)
+        sweeps = Parallel(n_jobs=self.n_jobs, max_nbytes="1M", mmap_mode="r")(
+            delayed(sweepFold)(self.estimator, combination, checkpoints, x, y, train_rows, test_rows, self.scoring)
+            for combination in combinations for train_rows, test_rows in self.cv)
+
+        #################################################################################
+
+        #Collect the scores per candidate (combination and number of trees), in the same format as the sklearn searches
+        candidates = []
+        scores = {}
+        fit_times = []
+        for i, combination in enumerate(combinations):
+            combination_sweeps = sweeps[i * n_splits:(i + 1) * n_splits]
+
+            for j, n_estimators in enumerate(checkpoints):
+                candidates.append(dict(combination, n_estimators=n_estimators))
+                fit_times.append(np.mean([sweep[j][1] for sweep in combination_sweeps]))
+
+                for name in combination_sweeps[0][j][0]:
+                    split_scores = [sweep[j][0][name] for sweep in combination_sweeps]
+                    scores.setdefault("mean_test_" + name, []).append(np.mean(split_scores))
+
+        self.cv_results_ = {"params": candidates, "mean_fit_time": np.array(fit_times)}
+        self.cv_results_.update({name: np.array(values) for name, values in scores.items()})
+
+        self.n_splits_ = n_splits
+
+        #Number of forests grown, one per combination and split (the candidates share the forest of their combination)
+        self.n_fits_ = len(combinations) * n_splits
+        self.best_index_ = int(np.argmax(self.cv_results_["mean_test_" + self.refit]))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = self.cv_results_["mean_test_" + self.refit][self.best_index_]
+
+        #Train the best combination on the full training set
+        start = time.perf_counter()
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(x, y)
+        self.refit_time_ = time.perf_counter() - start
+
+        return self
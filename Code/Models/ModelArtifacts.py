@@ -0,0 +1,148 @@
+#Imports
+import os
+import copy
+import time
+import pickle
+import joblib
+
+from Code.Models.TreeEnsemble import isTreeEnsemble, exportEnsemble, saveEnsemble, loadEnsemble, ensemblePath, \
+    ensemble_extension
+
+#Extensions of the files of a saved model:
+#- ".joblib": the model, with the numpy arrays (e.g. the node arrays of the forest trees) stored as raw arrays that
+#  are memory mapped when the model is imported
+#- ".joblib.z": the same, compressed with zlib (smaller on disk, but the arrays can't be memory mapped)
+#- ".ubj": the booster of XGBoost models in the native XGBoost binary format, the ".joblib" file then contains the
+#  model without the booster
+#- ".trees.joblib": the trees of forest and XGBoost models as flat node arrays, for predictions without sklearn and
+#  xgboost (see TreeEnsemble)
+#- ".sav": pickled model, as saved by earlier versions
+artifact_extensions = [".joblib", ".joblib.z", ".ubj", ensemble_extension, ".sav"]
+
+def artifactBase(path):
+    """
+    This function returns the path of a saved model without extension
+
+    Parameters:
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+
+    Returns: Path without extension
+    """
+
+    return os.path.splitext(path)[0]
+
+
+def artifactFiles(path):
+    """
+    This function returns the files of a saved model that are imported by loadModel
+
+    Parameters:
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+
+    Returns: List with the paths of the files, empty if the model is not saved
+    """
+
+    base = artifactBase(path)
+
+    for extension in [".joblib", ".joblib.z"]:
+        if os.path.isfile(base + extension):
+            return [base + extension] + ([base + ".ubj"] if os.path.isfile(base + ".ubj") else [])
+
+    return [base + ".sav"] if os.path.isfile(base + ".sav") else []
+
+
+def saveModel(model, path, compression=0):
+    """
+    This function saves a trained model in the format of its model type. XGBoost boosters are saved in the native
+    XGBoost format, all other models are saved with joblib. The trees of forest and XGBoost models are also exported
+    as flat node arrays. Files of an earlier saved model are removed.
+
+    Parameters:
+    - model (model): trained model
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+    - compression (int): zlib compression level (0-9) of the joblib file, 0 saves it uncompressed so it can be memory
+      mapped
+
+    Returns: List with the paths of the saved files
+    """
+
+    base = artifactBase(path)
+
+    #Remove the files of the earlier saved model
+    for extension in artifact_extensions:
+        if os.path.isfile(base + extension):
+            os.remove(base + extension)
+
+    files = []
+
+    #Trees as flat node arrays
+    if isTreeEnsemble(model):
+        saveEnsemble(exportEnsemble(model), path)
+        files.append(base + ensemble_extension)
+
+    #XGBoost booster in the native format, the rest of the model is saved without the booster
+    if hasattr(model, "booster_"):
+        model.booster_.save_model(base + ".ubj")
+        files.append(base + ".ubj")
+
+        model = copy.copy(model)
+        del model.booster_
+
+    if compression:
+        joblib.dump(model, base + ".joblib.z", compress=("zlib", compression))
+        files.insert(0, base + ".joblib.z")
+    else:
+        joblib.dump(model, base + ".joblib")
+        files.insert(0, base + ".joblib")
+
+    return files
+
+
+def loadModel(path, tree_engine=False):
+    """
+    This function imports a saved model (see saveModel). Models saved as pickle by earlier versions are imported as
+    pickle.
+
+    Parameters:
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+    - tree_engine (bool): if True, the trees of forest and XGBoost models are imported as flat node arrays (see
+      TreeEnsemble), which predict without sklearn and xgboost
+
+    Returns:
+    - model: Imported model
+    - metrics (dict): format, size on disk (MB) and import time (seconds) of the model
+    """
+
+    files = [ensemblePath(path)] if tree_engine and os.path.isfile(ensemblePath(path)) else artifactFiles(path)
+    if not files:
+        raise FileNotFoundError("No saved model found at {0}".format(artifactBase(path)))
+
+    start = time.perf_counter()
+
+    #Trees as flat node arrays
+    if files[0].endswith(ensemble_extension):
+        model = loadEnsemble(path)
+
+    #Model saved with joblib, uncompressed arrays are memory mapped instead of read
+    elif files[0].endswith(".joblib"):
+        model = joblib.load(files[0], mmap_mode="r")
+    elif files[0].endswith(".joblib.z"):
+        model = joblib.load(files[0])
+
+    #Model saved as pickle
+    else:
+        with open(files[0], "rb") as f:
+            model = pickle.load(f)
+
+    #XGBoost booster saved in the native format, xgboost is only imported when needed
+    if len(files) > 1:
+        import xgboost as xgb
+        model.booster_ = xgb.Booster(model_file=files[1])
+
+    load_time = time.perf_counter() - start
+
+    metrics = {"Model": os.path.basename(artifactBase(path)),
+               "Format": "+".join(os.path.basename(file).split(".", 1)[1] for file in files),
+               "Size MB": sum(os.path.getsize(file) for file in files) / 2**20, "Load Time": load_time}
+
+    return model, metrics
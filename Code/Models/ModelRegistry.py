@@ -0,0 +1,165 @@
+#Imports
+import os
+import glob
+import pickle
+import hashlib
+import importlib
+
+from Code.ImportData.CacheData import fileHash
+from Code.Models.ModelArtifacts import artifactFiles
+
+#Libraries that change the trained models and their results
+libraries = ["numpy", "pandas", "sklearn", "xgboost", "joblib", "threadpoolctl"]
+
+def libraryVersions():
+    """
+    This function returns the versions of the libraries used to train the models
+
+    Returns: Dict with the version per library
+    """
+
+    return {name: importlib.import_module(name).__version__ for name in libraries}
+
+
+def codeHash():
+    """
+    This function returns the hash of the scripts that construct the models, so models are trained again when the
+    code (e.g. the fixed random seeds or the scoring) changes
+
+    Returns: Hex digest of the contents of the scripts
+    """
+
+    code_hash = hashlib.sha256()
+
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        code_hash.update(fileHash(path).encode())
+
+    return code_hash.hexdigest()
+
+
+def modelFingerprint(family, name, data_hash, folds_hash, models_dict, params_dict):
+    """
+    This function returns the fingerprint of a model, based on everything that changes the trained model and its results
+
+    Parameters:
+    - family (str): "reg" for Regression models, "clas" for Classification models
+    - name (str): unique ID model
+    - data_hash (str): hash of the train/evaluation split of the model family
+    - folds_hash (str): hash of the train dates and test dates of the n splits
+    - models_dict (dict): all parameters for the models
+    - params_dict (dict): all general hyperparameters that can be changed by user
+
+    Returns: Fingerprint (str)
+    """
+
+    settings = {"family": family, "name": name, "data": data_hash, "folds": folds_hash, "model": models_dict[name],
+                "remove_sensor": params_dict["remove_sensor"], "code": codeHash(), "versions": libraryVersions()}
+
+    return hashlib.sha256(repr(settings).encode()).hexdigest()
+
+
+def modelHash(model_path):
+    """
+    This function returns the hash of the files of a saved model (see ModelArtifacts.artifactFiles)
+
+    Parameters:
+    - model_path (str): path to the saved model
+
+    Returns: Hex digest of the contents of the files, None if the model is not saved
+    """
+
+    files = artifactFiles(model_path)
+    if not files:
+        return None
+
+    model_hash = hashlib.sha256()
+    for path in files:
+        model_hash.update(fileHash(path).encode())
+
+    return model_hash.hexdigest()
+
+
+def modelPath(output_dict, name, remove_sensor):
+    """
+    This function returns the path of the saved model (see modelConstruction), the files of the model are saved next to
+    this path with the extension of their format (see ModelArtifacts.saveModel)
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - name (str): unique ID model
+    - remove_sensor (boolean): whether the model is trained for generalized predictions
+
+    Returns: Path to the saved model
+    """
+
+    if remove_sensor:
+        return "{0}{1}_model_generalize.sav".format(output_dict["models"], name)
+
+    return "{0}{1}_model.sav".format(output_dict["models"], name)
+
+
+def registryPath(output_dict, name, remove_sensor):
+    """
+    This function returns the path of the registry entry of a model
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - name (str): unique ID model
+    - remove_sensor (boolean): whether the model is trained for generalized predictions
+
+    Returns: Path to the registry entry
+    """
+
+    return os.path.join(output_dict["registry"], os.path.basename(modelPath(output_dict, name, remove_sensor)))
+
+
+def cachedResults(output_dict, name, remove_sensor, fingerprint):
+    """
+    This function returns the results of a model from the registry, if the model was trained with the same fingerprint
+    and the saved model is still the model that was registered
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - name (str): unique ID model
+    - remove_sensor (boolean): whether the model is trained for generalized predictions
+    - fingerprint (str): fingerprint of the model (see modelFingerprint)
+
+    Returns: Dict containing all metrics of the model, None if the model has to be trained
+    """
+
+    path = registryPath(output_dict, name, remove_sensor)
+    model_hash = modelHash(modelPath(output_dict, name, remove_sensor))
+
+    if not os.path.isfile(path) or model_hash is None:
+        return None
+
+    with open(path, "rb") as f:
+        entry = pickle.load(f)
+
+    if entry["fingerprint"] != fingerprint or entry["model_hash"] != model_hash:
+        return None
+
+    return entry["results"]
+
+
+def registerModel(output_dict, name, remove_sensor, fingerprint, results):
+    """
+    This function saves the fingerprint and results of a trained model in the registry
+
+    Parameters:
+    - output_dict (dict): all paths of where output files should be saved
+    - name (str): unique ID model
+    - remove_sensor (boolean): whether the model is trained for generalized predictions
+    - fingerprint (str): fingerprint of the model (see modelFingerprint)
+    - results (dict): all metrics of the model
+
+    Returns: Saved registry entry
+    """
+
+    os.makedirs(output_dict["registry"], exist_ok=True)
+
+    entry = {"fingerprint": fingerprint, "model_hash": modelHash(modelPath(output_dict, name, remove_sensor)),
+             "versions": libraryVersions(), "results": results}
+
+    with open(registryPath(output_dict, name, remove_sensor), "wb") as f:
+        pickle.dump(entry, f)
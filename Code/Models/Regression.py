@@ -1,116 +1,90 @@
-from sklearn.model_selection import RandomizedSearchCV
 import numpy as np
-from sklearn.metrics import mean_squared_error
-import pickle
+from sklearn.metrics import mean_squared_error, r2_score, get_scorer
+from functools import partial
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from Code.Models.CrossValidation import searchCV, fitSearch, searchCost
+from Code.Models.ModelArtifacts import saveModel
+from Code.Models.XGBoostModels import searchFitParams
 
-def hyperParameter(x_train, y_train, score, model, model_name, cycles, **params):
+
+def foldScores(estimator, x, y, score):
     """
-    This function fits multiple hyperparameters to find the optimal combinationf.
+    This function scores the model on the test rows of one split. Used as scoring function of the hyperparameter
+    search, so the scores of the best parameters can be reused as training scores.
 
     Parameters:
-    - x_train (df): training features model
-    - y_train (df): training target model
-    - score (str): scoring metric used to find the best model 
-    - model (model): model that needs to be evaluated
-    - model_name (str): unique ID model
-    - cycles (int): number of iterations to test the model
-    - params: dict with optimal model hyperparameters
+    - estimator (model): model trained on the train rows of the split
+    - x (array/df): test features of the split
+    - y (array): test target of the split
+    - score (str): scoring metric used to find the best model
 
-    Returns:
-    - Dict with the optimal combination of parameters
-    - Score of the best model
+    Returns: Dict with the scoring metric, R2 score and RMSE score of the split
     """
 
-    #Call on the the hyper parameter fitting modle
-    hyp = RandomizedSearchCV(estimator=model, param_distributions=params, n_iter=cycles, scoring=score, n_jobs=4, cv=10,
-                            refit=score, random_state=42)
+    y_pred_model = estimator.predict(x)
 
-    #Run hyper parameter fitting
-    ## XGB Regressor model only takes values as input
-    if model_name == "xgbr":
-        model = hyp.fit(x_train.drop(
-            columns={"Date"}).values, y_train["CrowdednessCount"].values)
-    else:
-        model = hyp.fit(x_train.drop(
-            columns={"Date"}), y_train["CrowdednessCount"])
+    return {"score": get_scorer(score)(estimator, x, y),
+            "r2": r2_score(y, y_pred_model),
+            "rmse": np.sqrt(mean_squared_error(y_pred_model, y))}
 
-    return model.best_params_, model.best_score_
 
-def trainModel(x_train, y_train, train_dates, kf, model, params, model_name, kf_size):
+def hyperParameter(train, score, model, model_name, cycles, resources, search, **params):
     """
-    This function trains and tests the model k times, by splitting the data k times
+    This function fits multiple hyperparameters to find the optimal combination. All combinations are tested on the
+    given splits of the training dates, and the best combination is trained on the full training set.
 
     Parameters:
-    - x_train (df): training features model
-    - y_train (df): training target model
-    - train_dates (list): dates present in training model
-    - kf (model): used to split training dates into training and test k times
+    - train (tuple): training set sorted on date, with the rows of each split (see CrossValidation.foldMatrices)
+    - score (str): scoring metric used to find the best model 
     - model (model): model that needs to be evaluated
-    - params: dict with optimal model hyperparameters
     - model_name (str): unique ID model
-    - kf_size (int): number of splits in KFolds
+    - cycles (int): number of iterations to test the model
+    - resources (dict): number of search processes and threads per model (see CPUBudget.cpuSchedule)
+    - search (dict): search strategy settings (see CrossValidation.searchCV)
+    - params: dict with optimal model hyperparameters
 
     Returns:
-    - Mean R2 score of all k splits
-    - Mean RMSE score of all k splits
+    - Dict with the optimal combination of parameters
+    - Score of the best model
+    - Mean R2 score of the best model over all k splits
+    - Mean RMSE score of the best model over all k splits
+    - Dict with the compute spent by the search
+    - Best model, trained on the full training set
     """
 
-    #variables
-    mean_score = 0
-    mean_rmse = 0
-
     #If model is baseline, don't include random state and n_jobs
     if model_name != "lr":
-        params["random_state"] = 42
-        params["n_jobs"] = 4
-        model.set_params(**params)
-    else:
-        model.set_params(**params)
-
-    #Split the train dates into train and test, n times
-    for train_index, test_index in kf.split(train_dates):
+        model.set_params(random_state=42, n_jobs=resources["threads"])
 
-        #Select rows dataset based on the dates in train_index
+    #Training set sorted on date, with the rows of each split
+    x, y, columns, cv, dates = train
 
-        ## XGB Regressor model only takes values as input
-        if model_name == "xgbr":
-            x = x_train[x_train["Date"].isin(train_dates[train_index])].drop(
-                columns={"Date"}).values
-            y = y_train[y_train["Date"].isin(
-                train_dates[train_index])]["CrowdednessCount"].values
-            
-            model.fit(x, y)
+    ## XGB Regressor model only takes values as input, the DF of the other models doesn't copy the matrix
+    if model_name != "xgbr":
+        x = pd.DataFrame(x, columns=columns, copy=False)
 
-            x_test = x_train[x_train["Date"].isin(
-                train_dates[test_index])].drop(columns={"Date"}).values
-            y_test = y_train[y_train["Date"].isin(
-                train_dates[test_index])]["CrowdednessCount"].values
-
-            mean_score += model.score(x_test, y_test)
-
-            y_pred_model = model.predict(x_test)
-            mean_rmse += np.sqrt(mean_squared_error(y_pred_model,y_test))
-        
-        else:
-            model.fit(x_train[x_train["Date"].isin(train_dates[train_index])].drop(columns={"Date"}),
-                      y_train[y_train["Date"].isin(train_dates[train_index])]["CrowdednessCount"])
+    #Call on the the hyper parameter fitting modle
+    hyp = searchCV(model, params, cycles, partial(foldScores, score=score), resources["workers"], cv, search)
 
-            mean_score += model.score(x_train[x_train["Date"].isin(train_dates[test_index])].drop(columns={"Date"}),
-                                    y_train[y_train["Date"].isin(train_dates[test_index])]["CrowdednessCount"])
+    #Run hyper parameter fitting, XGB models hold out the last dates of each split for early stopping and reuse the 
+    #quantized matrices of each split
+    if model_name == "xgbr":
+        model = fitSearch(hyp, x, y, resources, **searchFitParams(dates))
+    else:
+        model = fitSearch(hyp, x, y, resources)
 
-            y_pred_model = model.predict(x_train[x_train["Date"].isin(
-                train_dates[test_index])].drop(columns={"Date"}))
-            mean_rmse += np.sqrt(mean_squared_error(y_pred_model,
-                                                    y_train[y_train["Date"].isin(train_dates[test_index])]["CrowdednessCount"]))
+    #Parameters of the best model
+    best_params = dict(model.best_params_)
+    if model_name != "lr":
+        best_params.update(random_state=42, n_jobs=resources["threads"])
 
-    #Take the mean scores over the n iterations
-    mean_score /= kf_size
-    mean_rmse /= kf_size
+    #Mean scores of the best model over the k splits
+    train_score = model.cv_results_["mean_test_r2"][model.best_index_]
+    train_rmse = model.cv_results_["mean_test_rmse"][model.best_index_]
 
-    return mean_score, mean_rmse, model
+    return best_params, model.best_score_, train_score, train_rmse, searchCost(model), model.best_estimator_
 
 
 def evalModel(model, x_eval, y_eval, plot_dir, model_name):
@@ -144,8 +118,8 @@ def evalModel(model, x_eval, y_eval, plot_dir, model_name):
         
     return eval_model_score, np.sqrt(eval_model_mse)
 
-def modelConstruction(model_dir, plot_dir, model_name, model, x_train, y_train, x_eval, y_eval, score, train_dates, kf, cycles, params, kf_size, 
-                      remove_sensor):
+def modelConstruction(model_dir, plot_dir, model_name, model, train, x_eval, y_eval, score, cycles, params, 
+                      remove_sensor, resources={"workers": 1, "threads": 1}, search={"strategy": "random"}, compression=0):
     """
     This function trains a linear regression model
 
@@ -154,17 +128,16 @@ def modelConstruction(model_dir, plot_dir, model_name, model, x_train, y_train,
     - plot_dir (str): directory where plots have to be saved
     - model_name (str): name of the model
     - model (model): model that needs to be evaluated
-    - x_train (df): training features model
-    - y_train (df): training target model
+    - train (tuple): training set sorted on date, with the rows of each split (see CrossValidation.foldMatrices)
     - x_eval (df): test features model
     - y_eval (df): test target model
     - score (str): sklearn standard scoring metric used by model
-    - train_dates (list): dates present in training model 
-    - kf (model): used to split training dates into training and test k times
     - cycles (int): number of iterations to test the model
     - visualization (bool): whether you want a scatter model of evaluation results
     - params: dict with optimal model hyperparameters
-    - kf_size (int): number of splits in KFolds
+    - resources (dict): number of search processes and threads per model (see CPUBudget.cpuSchedule)
+    - search (dict): search strategy settings (see CrossValidation.searchCV)
+    - compression (int): compression level of the saved model, 0 saves it uncompressed (see ModelArtifacts.saveModel)
 
     Returns: Dict containing all metrics of hyperparameter, training and evaluation of the model
     """
@@ -172,15 +145,16 @@ def modelConstruction(model_dir, plot_dir, model_name, model, x_train, y_train,
     #Dict to save all the results in
     results_dict = {}
 
-    #Hyper parameter tuning
-    best_params, best_score = hyperParameter(
-        x_train, y_train, score, model, model_name, cycles, **params)
+    #Hyper parameter tuning, the scores of the best parameters on the k splits are the training scores
+    best_params, best_score, train_score, train_rmse, search_cost, model = hyperParameter(
+        train, score, model, model_name, cycles, resources, search, **params)
     results_dict["Hyper R2 Score"] = best_score
     results_dict["Model Parameters"] = best_params
+    results_dict.update(search_cost)
 
-    #Train the model
-    train_score, train_rmse, model = trainModel(
-        x_train, y_train, train_dates, kf, model, best_params, model_name, kf_size)
+    #Number of trees used by XGB models with early stopping
+    if hasattr(model, "best_iteration_"):
+        results_dict["Best Iteration"] = model.best_iteration_ + 1
     
     #Save results training
     results_dict["Train R2 Score"] = train_score
@@ -195,12 +169,12 @@ def modelConstruction(model_dir, plot_dir, model_name, model, x_train, y_train,
     results_dict["Test RMSE Score"] = eval_mse
 
     #Save the model
-    #Save model as pickle
+    #Save model (see ModelArtifacts.saveModel)
     if remove_sensor:
         filename = "{0}{1}_model_generalize.sav".format(model_dir, model_name)
     else:
         filename = "{0}{1}_model.sav".format(model_dir, model_name)
     
-    pickle.dump(model, open(filename, 'wb'))
+    saveModel(model, filename, compression)
 
     return results_dict
@@ -3,53 +3,72 @@ import numpy as np
 
 from sklearn.model_selection import train_test_split
 
-def classCrowdednessCounts(df):
+#Class bins are in a seperate script without sklearn, so the predictions can use them (see ClassBins)
+from Code.Models.ClassBins import class_quantiles, classBins, assignClasses
+
+def classCrowdednessCounts(df, bin_edges=None):
     """
-    This function divides the numerical counts of crowdedness into 4 classes. These classes asre based on the quantiles taken 
-    over all the values. 
+    This function divides the numerical counts of crowdedness into 4 classes. These classes are based on the quantiles
+    taken over all the values. Only the CrowdednessCount column is replaced, the other columns keep their dtypes and
+    are not copied.
 
     Parameters: 
     - df (df): Where the numerical counts need to be transformed into classes
+    - bin_edges (array): edges between the classes (None computes them from the df, see classBins)
 
     Returns: DF with transformed crowdedness classes
     """
 
-    #Variables
+    if bin_edges is None:
+        bin_edges = classBins(df["CrowdednessCount"])
+
+    return df.assign(CrowdednessCount=assignClasses(df["CrowdednessCount"], bin_edges))
+
+def dateIndex(df):
+    """
+    This function sorts the rows of the given df on date once, and finds for each date the range of rows it spans in the
+    sorted order. The rows of a set of dates can then be selected as slices, instead of searching the full df.
+
+    Parameters:
+    - df (df): DataFrame with a Date column
+
+    Returns: Dict with the row order sorted on date ("order"), the unique dates ("dates") and per date the first
+    ("starts") and last + 1 ("ends") row in the sorted order
+    """
+
+    #Sort the rows on date, rows with the same date keep their order
+    order = np.argsort(df["Date"].values, kind="mergesort")
 
-    #Quantile splits
-    low_split = df["CrowdednessCount"].quantile(.25)
-    mid_split = df["CrowdednessCount"].quantile(.5)
-    high_split = df["CrowdednessCount"].quantile(.75)
+    #First row of each date in the sorted order
+    dates, starts = np.unique(df["Date"].values[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
 
-    #################################################################################
+    return {"order": order, "dates": dates, "starts": starts, "ends": ends}
 
-    #Dataframe to dict
-    clas_dict = df.to_dict("index")
 
-    #Loop over all crowdedness counts
-    for k, v in clas_dict.items():
+def foldRows(date_index, fold_dates):
+    """
+    This function returns the rows of the given dates, as positions in the df sorted on date (see dateIndex)
 
-        #If the crowdedness count is below the 25% quantile, class 1 is assigned
-        if v["CrowdednessCount"] < low_split:
-            v["CrowdednessCount"] = 1
+    Parameters:
+    - date_index (dict): date index of the df, constructed by dateIndex
+    - fold_dates (list): dates of which the rows have to be selected
 
-        #If the crowdedness count is above the 25% quantile and below the 50% quantile, class 2 is assigned
-        elif v["CrowdednessCount"] >= low_split and v["CrowdednessCount"] < mid_split:
-            v["CrowdednessCount"] = 2
+    Returns: Array with the row positions, in the sorted order of the df
+    """
 
-        #If the crowdedness count is above the 50% quantile and below the 75% quantile, class 3 is assigned
-        elif v["CrowdednessCount"] >= mid_split and v["CrowdednessCount"] < high_split:
-            v["CrowdednessCount"] = 3
+    #Position of each date in the index, dates that are not in the df are skipped
+    dates = date_index["dates"]
+    pos = np.searchsorted(dates, np.sort(fold_dates))
+    pos = pos[(pos < len(dates)) & (dates[np.minimum(pos, len(dates) - 1)] == np.sort(fold_dates))]
 
-        #If the crowdedness count is above the 75% quantile, class 4 is assigned
-        elif v["CrowdednessCount"] >= high_split:
-            v["CrowdednessCount"] = 4
-        else:
-            print(k, " has class error as it fits in none")
+    #Concatenate the row ranges of all dates
+    starts = date_index["starts"][pos]
+    lengths = date_index["ends"][pos] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
 
-    df = pd.DataFrame.from_dict(clas_dict, orient="index")
+    return offsets + np.arange(lengths.sum())
 
-    return df
 
 def dateSplit(df, size):
     """
@@ -0,0 +1,417 @@
+#Imports
+import os
+import json
+import joblib
+import numpy as np
+
+#Extension of the file with the exported tree ensemble, saved next to the model (see ModelArtifacts.saveModel)
+ensemble_extension = ".trees.joblib"
+
+#Batches up to this number of rows move down all trees at the same time, larger batches move down one tree at a time
+small_batch = 512
+
+#Number of rows of a large batch that move down a tree at the same time, so the arrays of a step stay in the cache
+chunk_size = 2**14
+
+#Number of steps after which the rows of a large batch that reached a leaf are removed from the batch
+leaf_check = 4
+
+#Functions that convert the summed leaf values of XGBoost models to predictions, per objective
+xgb_links = {"reg:squarederror": "identity", "reg:squaredlogerror": "identity", "reg:pseudohubererror": "identity",
+             "reg:absoluteerror": "identity", "reg:quantileerror": "identity", "reg:logistic": "logistic",
+             "reg:tweedie": "exp", "reg:gamma": "exp", "count:poisson": "exp", "multi:softprob": "softmax",
+             "multi:softmax": "one_hot"}
+
+def packTrees(trees):
+    """
+    This function places the nodes of all trees after each other in one set of flat arrays. The nodes of each tree are
+    numbered level by level, so the right child of a node always directly follows its left child and only the left
+    child has to be stored. Leaves point to themselves and have no split value, so rows that reach a leaf stay there.
+
+    Parameters:
+    - trees (list): per tree a dict with per node the children ("left", "right", -1 for leaves), the split "feature"
+      and "threshold", whether missing values go left ("default_left") and the leaf "value"
+
+    Returns: Dict with the flat node arrays ("left", "feature", "threshold", "default_left", "value"), and the first
+    node ("roots") and depth ("depths") of each tree
+    """
+
+    arrays = {"left": [], "feature": [], "threshold": [], "default_left": [], "value": []}
+    roots, depths = [], []
+    n_nodes = 0
+
+    for tree in trees:
+        #Order the nodes level by level, with the children of a node next to each other
+        levels = [np.array([0])]
+        while True:
+            internal = levels[-1][tree["left"][levels[-1]] != -1]
+            if not len(internal):
+                break
+            levels.append(np.column_stack([tree["left"][internal], tree["right"][internal]]).ravel())
+
+        order = np.concatenate(levels)
+        position = np.empty(len(tree["left"]), dtype=np.int64)
+        position[order] = np.arange(len(order)) + n_nodes
+
+        leaves = tree["left"][order] == -1
+        arrays["left"].append(np.where(leaves, position[order], position[tree["left"][order]]))
+        arrays["feature"].append(np.where(leaves, 0, tree["feature"][order]))
+        arrays["threshold"].append(np.where(leaves, np.nan, tree["threshold"][order]))
+        arrays["default_left"].append(np.where(leaves, True, tree["default_left"][order]))
+        arrays["value"].append(tree["value"][order])
+
+        roots.append(n_nodes)
+        depths.append(len(levels) - 1)
+        n_nodes += len(order)
+
+    packed = {name: np.concatenate(values) for name, values in arrays.items()}
+    packed["left"] = packed["left"].astype(np.int32)
+    packed["feature"] = packed["feature"].astype(np.int32)
+    packed["threshold"] = packed["threshold"].astype(np.float64)
+    packed["default_left"] = packed["default_left"].astype(bool)
+    packed["value"] = packed["value"].astype(np.float64)
+    packed["roots"] = np.array(roots, dtype=np.int32)
+    packed["depths"] = np.array(depths, dtype=np.int32)
+
+    return packed
+
+
+class TreeEnsemble:
+    """
+    Trained tree ensemble (forest or XGBoost model) stored as flat node arrays (see packTrees), so predictions only
+    need NumPy. The rows are moved down the trees one level per step, for all rows at the same time.
+
+    Attributes:
+    - left, feature, threshold, default_left, value, roots, depths (array): flat node arrays of the trees
+    - strict (bool): if True, values go left when below the split value (XGBoost), otherwise when below or equal
+      (sklearn)
+    - tree_outputs (array): output (class) each tree adds its leaf value to, if the leaves have a single value
+    - scale (float): weight of the leaf values of each tree
+    - base_margin (array): value added to each output before the link function
+    - link (str): function that converts the outputs to predictions ("identity", "exp", "logistic", "softmax",
+      "one_hot")
+    - classes (array): class labels of classifiers (None for regression models)
+    """
+
+    def __init__(self, trees, strict, tree_outputs, scale, base_margin, link, classes):
+        for name, values in packTrees(trees).items():
+            setattr(self, name, values)
+
+        self.strict = strict
+        self.tree_outputs = tree_outputs
+        self.scale = scale
+        self.base_margin = base_margin
+        self.link = link
+        self.classes = classes
+
+    def step(self, nodes, values, has_missing):
+        """
+        This function moves rows one level down the trees
+
+        Parameters:
+        - nodes (array): current node of each row
+        - values (array): value of the split feature of the current node of each row
+        - has_missing (bool): whether the values can be missing
+
+        Returns: Array with the next node of each row
+        """
+
+        threshold = self.threshold.take(nodes)
+        go_right = values >= threshold if self.strict else values > threshold
+
+        if has_missing:
+            go_right = np.where(np.isnan(values), ~self.default_left.take(nodes), go_right)
+
+        return self.left.take(nodes) + go_right
+
+    def smallBatch(self, x, has_missing):
+        """
+        This function moves the rows down all trees at the same time, few steps are needed for a small batch of rows
+
+        Parameters:
+        - x (array): features, as float32
+        - has_missing (bool): whether the features contain missing values
+
+        Returns: Array with the outputs per row (rows x outputs)
+        """
+
+        nodes = np.broadcast_to(self.roots, (len(x), len(self.roots)))
+
+        for step in range(self.depths.max()):
+            nodes = self.step(nodes, np.take_along_axis(x, self.feature[nodes], axis=1), has_missing)
+
+        #Leaves with the value of each output (class probabilities)
+        if self.value.ndim == 2:
+            return self.value[nodes].sum(axis=1) * self.scale
+
+        return (self.value[nodes] * self.scale) @ np.eye(len(self.base_margin))[self.tree_outputs]
+
+    def largeBatch(self, x, has_missing):
+        """
+        This function moves the rows down one tree at a time, in chunks of rows, so each step works on the nodes of a
+        single tree
+
+        Parameters:
+        - x (array): features, as float32
+        - has_missing (bool): whether the features contain missing values
+
+        Returns: Array with the outputs per row (rows x outputs)
+        """
+
+        output = np.zeros((len(x), len(self.base_margin)))
+
+        for start in range(0, len(x), chunk_size):
+            #Features per column, so the value of a row and feature is at feature * rows + row
+            values = np.ascontiguousarray(x[start:start + chunk_size].T).ravel()
+            n_rows = min(chunk_size, len(x) - start)
+            rows = np.arange(n_rows)
+            chunk_output = output[start:start + n_rows]
+
+            for tree, root in enumerate(self.roots):
+                leaves = np.empty(n_rows, dtype=np.int32)
+                nodes = np.full(n_rows, root, dtype=np.int32)
+                active = rows
+
+                for step in range(self.depths[tree]):
+                    nodes = self.step(nodes, values.take(self.feature.take(nodes) * n_rows + active), has_missing)
+
+                    #Every few steps, the rows that reached a leaf stop moving
+                    if step % leaf_check == leaf_check - 1:
+                        done = self.left.take(nodes) == nodes
+                        leaves[active[done]] = nodes[done]
+                        active, nodes = active[~done], nodes[~done]
+
+                leaves[active] = nodes
+
+                if self.value.ndim == 2:
+                    chunk_output += self.value.take(leaves, axis=0) * self.scale
+                else:
+                    chunk_output[:, self.tree_outputs[tree]] += self.value.take(leaves) * self.scale
+
+        return output
+
+    def rawPredict(self, x):
+        """
+        This function returns the summed leaf values of each output
+
+        Parameters:
+        - x (array/df): features
+
+        Returns: Array with the outputs per row (rows x outputs)
+        """
+
+        #Same precision as the features during the training of both sklearn and XGBoost models
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+
+        has_missing = bool(np.isnan(x).any())
+
+        if len(x) <= small_batch:
+            return self.smallBatch(x, has_missing) + self.base_margin
+
+        return self.largeBatch(x, has_missing) + self.base_margin
+
+    def predict_proba(self, x):
+        """
+        This function returns the class probabilities of a classifier
+
+        Parameters:
+        - x (array/df): features
+
+        Returns: Array with the probability of each class per row
+        """
+
+        output = self.rawPredict(x)
+
+        #The "multi:softmax" objective only returns the class, as a one-hot row (see XGBoostModels)
+        if self.link == "one_hot":
+            return np.eye(len(self.classes))[np.argmax(output, axis=1)]
+
+        if self.link == "softmax":
+            output = np.exp(output - output.max(axis=1, keepdims=True))
+            output /= output.sum(axis=1, keepdims=True)
+
+        return output
+
+    def predict(self, x):
+        """
+        This function returns the predictions of the ensemble, in the same way as the original model
+
+        Parameters:
+        - x (array/df): features
+
+        Returns: Array with the predicted value or class per row
+        """
+
+        if self.classes is not None:
+            return self.classes[np.argmax(self.rawPredict(x), axis=1)]
+
+        output = self.rawPredict(x)[:, 0]
+
+        if self.link == "exp":
+            return np.exp(output)
+        if self.link == "logistic":
+            return 1 / (1 + np.exp(-output))
+
+        return output
+
+
+#################################################################################
+
+def isTreeEnsemble(model):
+    """
+    This function checks whether a model can be exported as tree ensemble: sklearn forests, and XGBoost tree models with
+    a supported objective
+
+    Parameters:
+    - model (model): trained model
+
+    Returns: Boolean
+    """
+
+    if hasattr(model, "estimators_"):
+        return all(hasattr(tree, "tree_") for tree in np.ravel(model.estimators_))
+
+    if hasattr(model, "booster_"):
+        config = json.loads(model.booster_.save_config())["learner"]
+        return config["gradient_booster"]["name"] == "gbtree" and config["objective"]["name"] in xgb_links
+
+    return False
+
+
+def exportForest(model):
+    """
+    This function exports the trees of a sklearn random forest to flat node arrays
+
+    Parameters:
+    - model (model): trained RandomForestRegressor or RandomForestClassifier
+
+    Returns: TreeEnsemble
+    """
+
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+
+        #Regression: mean of the leaf, classification: fraction of each class in the leaf
+        value = tree.value[:, 0, :]
+        if hasattr(model, "classes_"):
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), np.finfo(np.float64).tiny)
+
+        trees.append({"left": tree.children_left, "right": tree.children_right, "feature": tree.feature,
+                      "threshold": tree.threshold, "value": value if value.shape[1] > 1 else value[:, 0],
+                      "default_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool))})
+
+    n_outputs = len(model.classes_) if hasattr(model, "classes_") else 1
+
+    return TreeEnsemble(trees, strict=False, tree_outputs=np.zeros(len(trees), dtype=np.int32),
+                        scale=1 / len(trees), base_margin=np.zeros(n_outputs), link="identity",
+                        classes=np.asarray(model.classes_) if hasattr(model, "classes_") else None)
+
+
+def exportXGBoost(model):
+    """
+    This function exports the trees of an XGBoost model (see XGBoostModels) to flat node arrays. Only the trees up to
+    the best iteration are exported.
+
+    Parameters:
+    - model (model): trained EarlyStoppingXGBRegressor or EarlyStoppingXGBClassifier
+
+    Returns: TreeEnsemble
+    """
+
+    learner = json.loads(model.booster_.save_raw("json"))["learner"]
+    booster = learner["gradient_booster"]["model"]
+
+    #Trees up to the best iteration, and the output (class) of each tree
+    n_trees = booster["iteration_indptr"][model.best_iteration_ + 1]
+    tree_outputs = np.array(booster["tree_info"][:n_trees], dtype=np.int32)
+    n_outputs = max(1, int(learner["learner_model_param"]["num_class"]))
+
+    trees = []
+    for tree in booster["trees"][:n_trees]:
+        if any(tree["split_type"]):
+            raise ValueError("Trees with categorical splits can't be exported")
+
+        #XGBoost stores the split values as float32, the JSON only contains the digits needed to read them as float32.
+        #The split value of a leaf is its leaf value
+        split_conditions = np.array(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+        left = np.array(tree["left_children"])
+
+        trees.append({"left": left, "right": np.array(tree["right_children"]),
+                      "feature": np.array(tree["split_indices"]), "threshold": split_conditions,
+                      "value": np.where(left == -1, split_conditions, 0),
+                      "default_left": np.array(tree["default_left"], dtype=bool)})
+
+    #The starting value is saved as prediction, except for multi-class models
+    link = xgb_links[learner["objective"]["name"]]
+    base_score = np.array(learner["learner_model_param"]["base_score"].strip("[]").split(","),
+                          dtype=np.float32).astype(np.float64)
+    if link == "exp":
+        base_score = np.log(base_score)
+    elif link == "logistic":
+        base_score = np.log(base_score / (1 - base_score))
+
+    return TreeEnsemble(trees, strict=True, tree_outputs=tree_outputs, scale=1.0,
+                        base_margin=np.broadcast_to(base_score, n_outputs).copy(), link=link,
+                        classes=np.asarray(model.classes_) if hasattr(model, "classes_") else None)
+
+
+def exportEnsemble(model):
+    """
+    This function exports a trained forest or XGBoost model to flat node arrays (see isTreeEnsemble)
+
+    Parameters:
+    - model (model): trained model
+
+    Returns: TreeEnsemble
+    """
+
+    if hasattr(model, "estimators_"):
+        return exportForest(model)
+
+    return exportXGBoost(model)
+
+
+#################################################################################
+
+def ensemblePath(path):
+    """
+    This function returns the path of the exported tree ensemble of a saved model
+
+    Parameters:
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+
+    Returns: Path to the exported tree ensemble
+    """
+
+    return os.path.splitext(path)[0] + ensemble_extension
+
+
+def saveEnsemble(ensemble, path):
+    """
+    This function saves an exported tree ensemble next to the saved model, uncompressed so the node arrays are memory
+    mapped when imported
+
+    Parameters:
+    - ensemble (TreeEnsemble): exported tree ensemble
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+
+    Returns: Saved tree ensemble
+    """
+
+    joblib.dump(ensemble, ensemblePath(path))
+
+
+def loadEnsemble(path):
+    """
+    This function imports the exported tree ensemble of a saved model, with memory mapped node arrays
+
+    Parameters:
+    - path (str): path to the model (e.g. "Output/Models/rfg_model.sav")
+
+    Returns: TreeEnsemble
+    """
+
+    return joblib.load(ensemblePath(path), mmap_mode="r")
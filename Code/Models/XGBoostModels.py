@@ -0,0 +1,248 @@
+import hashlib
+import uuid
+from collections import OrderedDict
+import numpy as np
+import xgboost as xgb
+from sklearn.base import BaseEstimator, RegressorMixin, ClassifierMixin
+
+#Quantized matrices of the most recently used splits. Every parameter combination of the hyperparameter search is 
+#trained on the same k splits, so the matrices of a split only have to be constructed once per search process
+matrix_cache = OrderedDict()
+matrix_cache_size = 16
+
+def validationRows(dates, n_rows, validation_fraction):
+    """
+    This function selects the rows that are held out of the training set to decide when to stop training. The last
+    dates of the training set are held out, so all rows of a date are on the same side.
+
+    Parameters:
+    - dates (array): date of each row (None if unknown, then the last rows are held out)
+    - n_rows (int): number of rows in the training set
+    - validation_fraction (float): fraction of the dates that is held out
+
+    Returns: Boolean array, True for the held out rows
+    """
+
+    if not validation_fraction:
+        return np.zeros(n_rows, dtype=bool)
+
+    if dates is None:
+        return np.arange(n_rows) >= int(n_rows * (1 - validation_fraction))
+
+    #First date that is held out
+    unique_dates = np.unique(dates)
+    if len(unique_dates) < 2:
+        return np.zeros(n_rows, dtype=bool)
+
+    first_date = unique_dates[min(int(len(unique_dates) * (1 - validation_fraction)), len(unique_dates) - 1)]
+
+    return np.asarray(dates) >= first_date
+
+
+def searchFitParams(dates):
+    """
+    This function returns the fit arguments of an XGB model in the hyperparameter search. The search selects the rows 
+    of each split from every argument with one value per row, so each fit gets the positions of its rows in the 
+    training set. Together with a key of the search, these identify the split (see quantizedMatrices).
+
+    Parameters:
+    - dates (array): date of each row of the training set
+
+    Returns: Dict with the fit arguments
+    """
+
+    return {"dates": dates, "rows": np.arange(len(dates)), "search_key": uuid.uuid4().hex}
+
+
+def splitKey(rows, search_key):
+    """
+    This function returns the key of a split of the hyperparameter search, based on the positions of its rows
+
+    Parameters:
+    - rows (array): positions of the rows of the split in the training set (None if unknown)
+    - search_key (str): key of the hyperparameter search (None if unknown)
+
+    Returns: Key of the split (None if the split can't be identified)
+    """
+
+    if rows is None or search_key is None:
+        return None
+
+    return (search_key, hashlib.sha1(np.ascontiguousarray(rows, dtype=np.int64).tobytes()).hexdigest())
+
+
+def quantizedMatrices(x, y, dates, validation_fraction, max_bin, n_jobs, split_key=None):
+    """
+    This function constructs the histogram-binned (quantized) training and validation matrix of a training set. The
+    matrices of the splits of the hyperparameter search are cached, so parameter combinations trained on the same 
+    split reuse them.
+
+    Parameters:
+    - x (array): features of the training set
+    - y (array): target of the training set
+    - dates (array): date of each row (None if unknown)
+    - validation_fraction (float): fraction of the dates that is held out for early stopping
+    - max_bin (int): maximum number of bins per feature
+    - n_jobs (int): number of threads used to construct the matrices
+    - split_key (tuple): key of the split (see splitKey), if None the matrices are not cached
+
+    Returns: Training matrix and validation matrix (None if no rows are held out)
+    """
+
+    #The cache key is based on the split and the settings
+    key = None if split_key is None else split_key + (x.shape, validation_fraction, max_bin)
+
+    if key is not None and key in matrix_cache:
+        matrix_cache.move_to_end(key)
+        return matrix_cache[key]
+
+    #################################################################################
+
+    validation = validationRows(dates, len(x), validation_fraction)
+
+    dtrain = xgb.QuantileDMatrix(x[~validation], y[~validation], max_bin=max_bin, nthread=n_jobs)
+    dvalid = xgb.QuantileDMatrix(x[validation], y[validation], ref=dtrain, nthread=n_jobs) \
+        if validation.any() else None
+
+    if key is None:
+        return dtrain, dvalid
+
+    #Save the matrices and remove the least recently used matrices
+    matrix_cache[key] = (dtrain, dvalid)
+    while len(matrix_cache) > matrix_cache_size:
+        matrix_cache.popitem(last=False)
+
+    return dtrain, dvalid
+
+
+class EarlyStoppingXGBModel(BaseEstimator):
+    """
+    XGBoost model that is trained on quantized matrices that are reused between fits on the same data, and stops
+    adding trees when the score on the held out last dates of the training set has not improved for
+    early_stopping_rounds trees. The number of trees used for predictions is saved as best_iteration_.
+    """
+
+    def __init__(self, n_estimators=100, learning_rate=0.3, booster="gbtree", objective=None, max_depth=6,
+                 subsample=1.0, colsample_bytree=1.0, gamma=0.0, max_bin=256, early_stopping_rounds=None,
+                 validation_fraction=0.1, random_state=None, n_jobs=None):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.booster = booster
+        self.objective = objective
+        self.max_depth = max_depth
+        self.subsample = subsample
+        self.colsample_bytree = colsample_bytree
+        self.gamma = gamma
+        self.max_bin = max_bin
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def boosterParams(self):
+        """
+        This function returns the training parameters of the XGBoost booster
+
+        Returns: Dict with the booster parameters
+        """
+
+        params = {"eta": self.learning_rate, "booster": self.booster, "max_depth": self.max_depth,
+                  "subsample": self.subsample, "colsample_bytree": self.colsample_bytree, "gamma": self.gamma,
+                  "max_bin": self.max_bin, "tree_method": "hist", "seed": self.random_state or 0}
+
+        #If n_jobs is not set or negative, all threads are used
+        if self.n_jobs is not None and self.n_jobs > 0:
+            params["nthread"] = self.n_jobs
+
+        return params
+
+    def trainBooster(self, x, y, params, dates, rows=None, search_key=None):
+        """
+        This function trains the booster on the quantized matrices of the training set
+
+        Parameters:
+        - x (array): features of the training set
+        - y (array): target of the training set
+        - params (dict): booster parameters
+        - dates (array): date of each row (None if unknown)
+        - rows (array): positions of the rows in the training set of the search (see searchFitParams)
+        - search_key (str): key of the hyperparameter search (see searchFitParams)
+
+        Returns: The trained model
+        """
+
+        x = np.asarray(x, dtype=np.float64)
+        n_jobs = self.n_jobs if self.n_jobs is not None and self.n_jobs > 0 else None
+
+        dtrain, dvalid = quantizedMatrices(x, y, dates, self.validation_fraction if self.early_stopping_rounds else 0,
+                                           self.max_bin, n_jobs, splitKey(rows, search_key))
+
+        self.booster_ = xgb.train(params, dtrain, num_boost_round=self.n_estimators,
+                                  evals=[(dvalid, "validation")] if dvalid is not None else (),
+                                  early_stopping_rounds=self.early_stopping_rounds if dvalid is not None else None,
+                                  verbose_eval=False)
+
+        #Number of trees used for predictions
+        self.best_iteration_ = self.booster_.best_iteration if dvalid is not None else self.n_estimators - 1
+        self.n_features_in_ = x.shape[1]
+
+        return self
+
+    def rawPredict(self, x):
+        """
+        This function returns the output of the booster, using the trees up to the best iteration
+
+        Parameters:
+        - x (array/df): features
+
+        Returns: Array with the booster output
+        """
+
+        return self.booster_.inplace_predict(np.asarray(x, dtype=np.float64),
+                                             iteration_range=(0, self.best_iteration_ + 1))
+
+
+class EarlyStoppingXGBRegressor(RegressorMixin, EarlyStoppingXGBModel):
+    """
+    XGBoost regression model with early stopping (see EarlyStoppingXGBModel)
+    """
+
+    def fit(self, x, y, dates=None, rows=None, search_key=None):
+        params = self.boosterParams()
+        params["objective"] = self.objective or "reg:squarederror"
+
+        return self.trainBooster(x, np.asarray(y, dtype=np.float64), params, dates, rows, search_key)
+
+    def predict(self, x):
+        return self.rawPredict(x)
+
+
+class EarlyStoppingXGBClassifier(ClassifierMixin, EarlyStoppingXGBModel):
+    """
+    XGBoost classification model with early stopping (see EarlyStoppingXGBModel). The class labels are converted to
+    0 to n_classes - 1 for training, and back to the original labels for predictions.
+    """
+
+    def fit(self, x, y, dates=None, rows=None, search_key=None):
+        self.classes_, y = np.unique(np.asarray(y), return_inverse=True)
+
+        params = self.boosterParams()
+        params["objective"] = self.objective or "multi:softprob"
+        if params["objective"].startswith("multi:"):
+            params["num_class"] = len(self.classes_)
+
+        return self.trainBooster(x, y.astype(np.float64), params, dates, rows, search_key)
+
+    def predict_proba(self, x):
+        output = self.rawPredict(x)
+
+        #Softmax returns the class, binary objectives return the probability of the second class
+        if self.objective == "multi:softmax":
+            return np.eye(len(self.classes_))[output.astype(int)]
+        if output.ndim == 1:
+            return np.column_stack([1 - output, output])
+
+        return output
+
+    def predict(self, x):
+        return self.classes_[np.argmax(self.predict_proba(x), axis=1)]
@@ -1,36 +1,37 @@
 import Code.Models.Regression as reg
 import Code.Models.Classification as clas
-from Code.Models.TrainTestSplit import trainTestSplit, classCrowdednessCounts
+from Code.Models.TrainTestSplit import trainTestSplit, classCrowdednessCounts, classBins, dateSplit
+from Code.Models.CrossValidation import foldPlan, foldMatrices
+from Code.Models.CPUBudget import cpuSchedule, cpuBudget
+from Code.Models.ModelRegistry import modelFingerprint, cachedResults, registerModel
+import Code.ImportData.DatasetStorage as dst
 import pandas as pd
 from sklearn.model_selection import KFold
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import tempfile
+import os
 import pickle
 
 #Models
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor, XGBClassifier
+from Code.Models.XGBoostModels import EarlyStoppingXGBRegressor, EarlyStoppingXGBClassifier
 from sklearn.dummy import DummyClassifier
 from sklearn.ensemble import RandomForestClassifier
 
-def regressionModels(output_dict, params_dict, models_dict, kf, full_df):
+def regressionSplit(params_dict, models_dict, full_df):
     """
-    This function constructs the Regression models
+    This function splits the dataset into the train and evaluation set of the Regression models
 
     Parameters:
-    - output_dict (dict): all paths of where output files should be saved
     - params_dict (dict): all general hyperparameters that can be changed by user
     - models_dict (dict): all parameters for the models
-    - kf (model): KFold split dataset n times
     - full_df (df): Full dataset with all data
 
-    Returns:
-    - Save models to pickle
-    - Save result models to CSV
+    Returns: x_train (df), y_train (df), x_eval (df), y_eval (df)
     """
 
-    #Dict to save model results in
-    metrics_dict = {}
-
     #If remove sensor, split the data on sensors
     if params_dict["remove_sensor"]:
         x_train = full_df[full_df["Sensor"] != params_dict["sensor_to_remove"]].drop(
@@ -49,53 +50,24 @@ def regressionModels(output_dict, params_dict, models_dict, kf, full_df):
     x_train, y_train, x_eval, y_eval, train_dates = trainTestSplit(
         full_df, models_dict["trainTest"]["size"])
 
-    #Loop over all needed model ID's and select the model based on the ID
-    for name in params_dict["reg_models"]:
-        if name == "lr":
-            model = LinearRegression()
-        elif name == "rfg":
-            model = RandomForestRegressor()
-        elif name == "xgbr":
-            model = XGBRegressor()
-
-        #Construct the model and save the model results
-        metrics_dict[name] = reg.modelConstruction(
-            output_dict["models"], output_dict["plots"], name, model, x_train, y_train, x_eval, y_eval, models_dict[name]["score"],
-            train_dates, kf, models_dict[name]["cycles"], models_dict[name]["params"], models_dict["KFold"]["size"],
-            params_dict["remove_sensor"])
+    return x_train, y_train, x_eval, y_eval
 
-    #Save model results in dict
-    df = pd.DataFrame.from_dict(metrics_dict, orient="index")
-
-    if params_dict["remove_sensor"]:
-        df.to_csv(output_dict["gen_reg_metrics"], index=True)
-    else:
-        df.to_csv(output_dict["reg_metrics"], index=True)
-
-def classificationModels(output_dict, params_dict, models_dict, kf, full_df):
+def classificationSplit(params_dict, models_dict, full_df, bin_edges=None):
     """
-    This function constructs the Classification models
+    This function converts the crowdedness counts to classes and splits the dataset into the train and evaluation 
+    set of the Classification models
 
     Parameters:
-    - output_dict (dict): all paths of where output files should be saved
     - params_dict (dict): all general hyperparameters that can be changed by user
     - models_dict (dict): all parameters for the models
-    - kf (model): KFold split dataset n times
     - full_df (df): Full dataset with all data
+    - bin_edges (array): edges between the classes (None computes them from the dataset, see classBins)
 
-    Returns:
-    - Save models to pickle
-    - Save result models to CSV
+    Returns: x_train (df), y_train (df), x_eval (df), y_eval (df)
     """
 
-    #Dict to save model results in
-    metrics_dict = {}
-
-    #Label of all the classes
-    labels = [1, 2, 3, 4]
-
     #Convert the numerical crowdednessCounts to class labels
-    class_df = classCrowdednessCounts(full_df)
+    class_df = classCrowdednessCounts(full_df, bin_edges)
 
     #If remove sensor, split the data on sensors
     if params_dict["remove_sensor"]:
@@ -115,28 +87,93 @@ def classificationModels(output_dict, params_dict, models_dict, kf, full_df):
     x_train, y_train, x_eval, y_eval, train_dates = trainTestSplit(
         class_df, models_dict["trainTest"]["size"])
 
-    #Loop over all needed model ID's and select the model based on the ID
-    for name in params_dict["clas_models"]:
-        if name == "dc":
-            model = DummyClassifier()
-        elif name == "rfc":
-            model = RandomForestClassifier()
-        elif name == "xgbc":
-            model = XGBClassifier()
-
-        #Construct the model and save the model results
-        metrics_dict[name] = clas.modelConstruction(
-            output_dict["models"], output_dict["plots"], name, model, labels, x_train, y_train, x_eval, y_eval, models_dict[name]["score"],
-            train_dates, kf, models_dict[name]["cycles"], models_dict[name]["params"], models_dict["KFold"]["size"],
-            params_dict["remove_sensor"])
+    return x_train, y_train, x_eval, y_eval
+
+def selectModel(name, models_dict):
+    """
+    This function returns the untrained model bound to the unique model ID
+
+    Parameters:
+    - name (str): unique ID model
+    - models_dict (dict): all parameters for the models
+
+    Returns: Untrained model
+    """
+
+    if name == "lr":
+        model = LinearRegression()
+    elif name == "rfg":
+        model = RandomForestRegressor()
+    elif name == "xgbr":
+        model = EarlyStoppingXGBRegressor(**models_dict[name].get("early_stopping", {}))
+    elif name == "dc":
+        model = DummyClassifier()
+    elif name == "rfc":
+        model = RandomForestClassifier()
+    elif name == "xgbc":
+        model = EarlyStoppingXGBClassifier(**models_dict[name].get("early_stopping", {}))
+
+    return model
+
+def constructModel(family, name, split_path, output_dict, params_dict, models_dict, folds, n_models):
+    """
+    This function constructs a single model. The train/evaluation split is read from the shared file as memory mapped
+    arrays, so models trained at the same time (and their search processes) read one copy of the feature matrix.
+
+    Parameters:
+    - family (str): "reg" for Regression models, "clas" for Classification models
+    - name (str): unique ID model
+    - split_path (str): path to the file with the train/evaluation split of the model family
+    - output_dict (dict): all paths of where output files should be saved
+    - params_dict (dict): all general hyperparameters that can be changed by user
+    - models_dict (dict): all parameters for the models
+    - folds (list): train dates and test dates of each of the n splits
+    - n_models (int): number of models constructed at the same time
+
+    Returns: Dict containing all metrics of hyperparameter, training and evaluation of the model
+    """
+
+    train, x_eval, y_eval = joblib.load(split_path, mmap_mode="r")
+    model = selectModel(name, models_dict)
+
+    #Divide the cores of this model over the search processes and the threads of the model
+    resources = cpuSchedule(params_dict, models_dict[name]["cycles"] * len(folds), n_models)
+
+    #Construct the model and return the model results
+    if family == "reg":
+        return reg.modelConstruction(
+            output_dict["models"], output_dict["plots"], name, model, train, x_eval, y_eval, models_dict[name]["score"],
+            models_dict[name]["cycles"], models_dict[name]["params"], params_dict["remove_sensor"],
+            resources, models_dict[name]["search"], params_dict["model_compression"])
+
+    #Label of all the classes
+    labels = [1, 2, 3, 4]
+
+    return clas.modelConstruction(
+        output_dict["models"], output_dict["plots"], name, model, labels, train, x_eval, y_eval, models_dict[name]["score"],
+        models_dict[name]["cycles"], models_dict[name]["params"], params_dict["remove_sensor"],
+        resources, models_dict[name]["search"], params_dict["model_compression"])
+
+def saveMetrics(metrics_dict, family, output_dict, params_dict):
+    """
+    This function saves the results of the models of a model family
+
+    Parameters:
+    - metrics_dict (dict): results per unique model ID
+    - family (str): "reg" for Regression models, "clas" for Classification models
+    - output_dict (dict): all paths of where output files should be saved
+    - params_dict (dict): all general hyperparameters that can be changed by user
+
+    Returns: Save result models to CSV
+    """
 
     #Save model results in dict
     df = pd.DataFrame.from_dict(metrics_dict, orient="index")
 
     if params_dict["remove_sensor"]:
-        df.to_csv(output_dict["gen_clas_metrics"], index=True)
+        df.to_csv(output_dict["gen_{0}_metrics".format(family)], index=True)
     else:
-        df.to_csv(output_dict["clas_metrics"], index=True)
+        df.to_csv(output_dict["{0}_metrics".format(family)], index=True)
 
 
 def models(output_dict, params_dict, models_dict, pred_dict):
@@ -158,8 +195,16 @@ def models(output_dict, params_dict, models_dict, pred_dict):
     kf = KFold(n_splits=models_dict["KFold"]["size"],
                shuffle=models_dict["KFold"]["shuffle"], random_state=42)
 
-    #Import Dataset
-    full_df = pd.read_csv(output_dict["full_df"])
+    #Memory of the imported dataset, saved with the results of the models
+    data_metrics = {}
+
+    #Import Dataset, without the dates used in prediction
+    if params_dict["remove_sensor"]:
+        full_df = dst.loadDataset(output_dict, params_dict, compact=params_dict["compact_dataset"],
+                                  metrics=data_metrics)
+    else:
+        full_df = dst.loadDataset(output_dict, params_dict, end_date=pred_dict["start_date"],
+                                  compact=params_dict["compact_dataset"], metrics=data_metrics)
 
     #Drop the unscaled station coordinates
     for station in params_dict["stations"]:
@@ -174,6 +219,85 @@ def models(output_dict, params_dict, models_dict, pred_dict):
         full_df = full_df[full_df["Date"] <= split_date].reset_index().drop(columns=[
             "index"])
 
-    #Construct models
-    regressionModels(output_dict, params_dict, models_dict, kf, full_df)
-    classificationModels(output_dict, params_dict, models_dict, kf, full_df)
\ No newline at end of file
+    #Split the train dates n times, the same splits are used by all models
+    train_dates, eval_dates = dateSplit(full_df, models_dict["trainTest"]["size"])
+    folds = foldPlan(kf, train_dates)
+
+    #Edges between the crowdedness classes, saved so predicted counts can be converted into the same classes
+    bin_edges = classBins(full_df["CrowdednessCount"])
+    pickle.dump(bin_edges, open(output_dict["class_bins"], 'wb'))
+
+    #Train/evaluation split of each model family
+    splits = {"reg": regressionSplit(params_dict, models_dict, full_df),
+              "clas": classificationSplit(params_dict, models_dict, full_df, bin_edges)}
+
+    #All models to construct, per model family
+    jobs = [("reg", name) for name in params_dict["reg_models"]] + \
+        [("clas", name) for name in params_dict["clas_models"]]
+
+    #Dict to save model results in, per model family
+    metrics_dict = {"reg": {}, "clas": {}}
+
+    #Reuse the results of models of which the training data and settings didn't change since they were trained
+    if params_dict["model_registry"]:
+        data_hashes = {family: joblib.hash(split) for family, split in splits.items()}
+        folds_hash = joblib.hash(folds)
+        fingerprints = {(family, name): modelFingerprint(family, name, data_hashes[family], folds_hash, models_dict,
+                                                         params_dict) for family, name in jobs}
+
+        for family, name in jobs:
+            results = cachedResults(output_dict, name, params_dict["remove_sensor"], fingerprints[(family, name)])
+            if results is not None:
+                print("The {0} model is unchanged, the saved model and results are reused".format(name))
+                metrics_dict[family][name] = results
+
+        jobs = [(family, name) for family, name in jobs if name not in metrics_dict[family]]
+
+    #################################################################################
+
+    #Number of models constructed at the same time
+    n_models = max(1, min(params_dict["model_workers"] or len(jobs), len(jobs), cpuBudget(params_dict)))
+
+    with tempfile.TemporaryDirectory() as split_dir:
+        #Save the train/evaluation split of each model family once, to be shared by all models. The training set is 
+        #saved as the float feature matrix of the splits (see foldMatrices), so it is only built once
+        split_paths = {"reg": os.path.join(split_dir, "reg_split.pkl"), "clas": os.path.join(split_dir, "clas_split.pkl")}
+        for family in set(family for family, name in jobs):
+            x_train, y_train, x_eval, y_eval = splits[family]
+            joblib.dump((foldMatrices(x_train, y_train, folds), x_eval, y_eval), split_paths[family])
+
+        #Construct models one after another
+        if n_models == 1:
+            for family, name in jobs:
+                try:
+                    metrics_dict[family][name] = constructModel(family, name, split_paths[family], output_dict,
+                                                                params_dict, models_dict, folds, n_models)
+                except Exception as e:
+                    raise RuntimeError("Constructing the {0} model failed: {1}".format(name, e)) from e
+
+                if params_dict["model_registry"]:
+                    registerModel(output_dict, name, params_dict["remove_sensor"], fingerprints[(family, name)],
+                                  metrics_dict[family][name])
+
+        #Construct models at the same time in seperate processes
+        else:
+            with ProcessPoolExecutor(max_workers=n_models) as executor:
+                futures = {(family, name): executor.submit(constructModel, family, name, split_paths[family], 
+                                                           output_dict, params_dict, models_dict, folds, n_models)
+                           for family, name in jobs}
+
+                for (family, name), future in futures.items():
+                    try:
+                        metrics_dict[family][name] = future.result()
+                    except Exception as e:
+                        raise RuntimeError("Constructing the {0} model failed: {1}".format(name, e)) from e
+
+                    if params_dict["model_registry"]:
+                        registerModel(output_dict, name, params_dict["remove_sensor"], fingerprints[(family, name)],
+                                      metrics_dict[family][name])
+
+    #Save model results with the memory of the dataset, in the order of the given models
+    saveMetrics({name: {**metrics_dict["reg"][name], **data_metrics} for name in params_dict["reg_models"]}, "reg",
+                output_dict, params_dict)
+    saveMetrics({name: {**metrics_dict["clas"][name], **data_metrics} for name in params_dict["clas_models"]}, "clas",
+                output_dict, params_dict)
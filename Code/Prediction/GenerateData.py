@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np 
-from sklearn.metrics.pairwise import rbf_kernel
+
+import Code.ImportData.StationWeights as sw
 
 def TransformDate(date):
     """
@@ -69,7 +70,7 @@ def TransformTime(date):
             "Day Cos": day_cos, "Hour Sin": hour_sin, "Hour Cos": hour_cos, "Hour": hour_list}
 
 
-def SelectSensor(sensor,hour, weekday, stations, sensor_dict, lat_scaler, lon_scaler, full_df, date):
+def SelectSensor(sensor,hour, weekday, stations, sensor_dict, lat_scaler, lon_scaler, full_df, date, sensor_weights):
     """
     This function returns the scaled coordinates of the given sensors and the weights and scores of the given stations,
     in relation to eah of the given sensors
@@ -80,10 +81,11 @@ def SelectSensor(sensor,hour, weekday, stations, sensor_dict, lat_scaler, lon_sc
     - weekday (int): given day of the week 
     - stations (list): list of all relevant stations
     - sensor_dict (dict): all latitude and longitude data of each given sensor
-    - lat_scaler (model): trained scaler to transform given latitude
-    - lon_scaler (model): trained scaler to transform given longitude
+    - lat_scaler (dict): scaler to transform given latitude (see StationWeights.loadScaler)
+    - lon_scaler (dict): scaler to transform given longitude (see StationWeights.loadScaler)
     - full_df (df): full dataset
     - date (str): date of the given prediction
+    - sensor_weights (df[row]): weight of each station for the given sensor (see StationWeights.stationWeights)
 
     Returns:
     - lon_scaled (float): scaled sensor longitude
@@ -93,14 +95,11 @@ def SelectSensor(sensor,hour, weekday, stations, sensor_dict, lat_scaler, lon_sc
     """
 
     #Scale the sensor longitude and latitude
-    lon_scaled = lon_scaler.transform(
-        sensor_dict["Longitude"].reshape(1, -1))
-    lat_scaled = lat_scaler.transform(
-        sensor_dict["Latitude"].reshape(1, -1))
+    lon_scaled = sw.scaleCoordinates(
+        sensor_dict["Longitude"].reshape(1, -1), lon_scaler)
+    lat_scaled = sw.scaleCoordinates(
+        sensor_dict["Latitude"].reshape(1, -1), lat_scaler)
 
-    #Save the unscaled sensor longitude and latitude in array
-    y = np.array((lat_scaled, lon_scaled)).reshape(-1, 1)
-    
     #Dict to save station data in
     weights_dict = {}
     coor_dict = {}
@@ -115,23 +114,17 @@ def SelectSensor(sensor,hour, weekday, stations, sensor_dict, lat_scaler, lon_sc
         #Save te average passenger counts of given station
         passengers = df[station + " passengers"][0]
 
-        #Save unscaled station longitude and latitude in array
-        x = np.array(df[station + " LatScaled"][0],
-                        df[station + " LonScaled"][0]).reshape(1, -1)
         coor_dict[station + " LatScaled"] = df[station + " LatScaled"][0]
         coor_dict[station + " LonScaled"] = df[station + " LonScaled"][0]
 
-        #Calculate rbf kernel between sensor and station longitude and latitude
-        weight = rbf_kernel(x, y)
-
         #Save the station weight and score in dict
         weights_dict.update({station + " passengers": passengers,
-                            station + " weight": weight[0][0]})
+                            station + " weight": sensor_weights[station + " weight"]})
 
     return lon_scaled, lat_scaled, weights_dict, coor_dict
 
 
-def constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_scaler, lon_scaler, full_df):
+def constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_scaler, lon_scaler, full_df, sensor_weights):
     """
     This function returns all features needed for a prediction, given a singel sensor and date
 
@@ -142,9 +135,10 @@ def constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_
     - sensor (str): given sensor
     - sensor_dict (dict): all latitude and longitude data of each given sensor
     - stations (list): list of all relevant stations
-    - lat_scaler (model): trained scaler to transform given latitude
-    - lon_scaler (model): trained scaler to transform given longitude
+    - lat_scaler (dict): scaler to transform given latitude (see StationWeights.loadScaler)
+    - lon_scaler (dict): scaler to transform given longitude (see StationWeights.loadScaler)
     - full_df (df): full dataset
+    - sensor_weights (df[row]): weight of each station for the given sensor
 
     Returns:
     - j (int): updates iteration
@@ -158,9 +152,9 @@ def constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_
     for i in range(len(time["Hour"])):
         #Retrieve scaled sensor longitude and latitude, and all the weights and scores of the given stations
         sensor_lon, sensor_lat, weights_dict, coor_dict = SelectSensor(sensor, time["Hour"][i], weekday, stations, sensor_dict,
-                                                            lat_scaler, lon_scaler, full_df, date)
+                                                            lat_scaler, lon_scaler, full_df, date, sensor_weights)
 
-        input_dict[j] = {"weekday": weekday, "is_weekend": is_weekend, "is_event": 0.0, 
+        input_dict[j] = {"weekday": weekday, "is_weekend": is_weekend, "is_event": 0.0, "event_count": 0.0, 
                          "month_sin": time["Month Sin"], "month_cos": time["Month Cos"], 
                          "day_sin": time["Day Sin"],"day_cos": time["Day Cos"], "hour_sin": time["Hour Sin"][i],
                          "hour_cos": time["Hour Cos"][i]}
@@ -179,7 +173,7 @@ def constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_
     return j, input_dict
 
 
-def combineData(dates, sensor, sensor_dict, stations, lat_scaler, lon_scaler, full_df):
+def combineData(dates, sensor, sensor_dict, stations, lat_scaler, lon_scaler, full_df, weights_filename):
     """
     This function constructs dict with all needed data to generate needed predictions
 
@@ -188,9 +182,10 @@ def combineData(dates, sensor, sensor_dict, stations, lat_scaler, lon_scaler, fu
     - sensor (str): given sensors
     - sensor_dict (dict): all latitude and longitude data of each given sensor
     - stations (list): list of all relevant stations
-    - lat_scaler (model): trained scaler to transform given latitude
-    - lon_scaler (model): trained scaler to transform given longitude
+    - lat_scaler (dict): scaler to transform given latitude (see StationWeights.loadScaler)
+    - lon_scaler (dict): scaler to transform given longitude (see StationWeights.loadScaler)
     - full_df (df): full dataset
+    - weights_filename (str): where the station weight matrix is stored
 
     Returns:
     - df with all needed data to generate prediction
@@ -200,10 +195,18 @@ def combineData(dates, sensor, sensor_dict, stations, lat_scaler, lon_scaler, fu
     input_dict = {}
     j = 0
 
+    #Weight of each station for the given sensor, only computed if the sensor is not in the saved weight matrix
+    station_coordinates = {station: (full_df[station + " Lat"][0], full_df[station + " Lon"][0])
+                           for station in stations}
+    sensor_coordinates = {sensor: (float(np.ravel(sensor_dict["Latitude"])[0]),
+                                   float(np.ravel(sensor_dict["Longitude"])[0]))}
+    sensor_weights = sw.stationWeights(
+        sensor_coordinates, station_coordinates, lat_scaler, lon_scaler, weights_filename).loc[sensor]
+
     #Check the size of the given sensors and dates and generate the appropriate data
     for date in dates:
         j, input_dict = constructSensorData(j, input_dict, date, sensor, sensor_dict, stations, lat_scaler,
-                                            lon_scaler, full_df)
+                                            lon_scaler, full_df, sensor_weights)
 
     return pd.DataFrame.from_dict(input_dict, orient="index")
 
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
 import random
+import os
+import pickle
 
 import Code.Prediction.GenerateData as pg 
 import Code.Prediction.importModels as im 
+import Code.ImportData.DatasetStorage as dst
+from Code.Models.ClassBins import assignClasses
 
 import matplotlib.pyplot as plt
 
@@ -14,10 +18,10 @@ def generatePredictions(model, stations, lat_scaler, lon_scaler, full_df, xgb_mo
     This function generates crowdedness predictions for specified sensors and dates
 
     Parameters:
-    - model (model): desired model to generate predictions with
+    - model (model): desired model to generate predictions with (estimator or TreeEnsemble)
     - stations (list): all given stations
-    - lat_scaler (model): trained scaler to transform given latitude
-    - lon_scaler (model): trained scaler to transform given longitude
+    - lat_scaler (dict): scaler to transform given latitude (see StationWeights.loadScaler)
+    - lon_scaler (dict): scaler to transform given longitude (see StationWeights.loadScaler)
     - full_df (df): full dataset
     - xgb_model (boolean): check whether model == xgb
     - output_dict (dict): all paths of output files
@@ -42,7 +46,7 @@ def generatePredictions(model, stations, lat_scaler, lon_scaler, full_df, xgb_mo
         
         #Construct df with all needed input data to generate predictions
         df = pg.combineData(dates, pred_dict["add_sensor"], sensor_dict,
-                            stations, lat_scaler, lon_scaler, full_df)
+                            stations, lat_scaler, lon_scaler, full_df, output_dict["station_weights"])
     
     #Check whether the models are trained for generalized prediction
     elif pred_dict["generalized_df"]:
@@ -90,19 +94,36 @@ def prediction(output_dict, params_dict, pred_dict):
     - pred_dict (dict): hyperparameters prediction
     """
 
-    #Import needed csv files
-    full_df = pd.read_csv(output_dict["full_df"])
+    #Memory of the imported dataset, saved with the import time of the model
+    data_metrics = {}
+
+    #Import the rows of the dataset needed for the prediction
+    if pred_dict["generate_df"]:
+        full_df = dst.loadDataset(output_dict, params_dict, sensors=[pred_dict["add_sensor"]],
+                                  compact=params_dict["compact_dataset"], metrics=data_metrics)
+    elif pred_dict["generalized_df"]:
+        full_df = dst.loadDataset(output_dict, params_dict, sensors=[params_dict["sensor_to_remove"]],
+                                  compact=params_dict["compact_dataset"], metrics=data_metrics)
+    else:
+        full_df = dst.loadDataset(output_dict, params_dict, start_date=pred_dict["start_date"],
+                                  end_date=pred_dict["end_date"], sensors=[pred_dict["add_sensor"]],
+                                  compact=params_dict["compact_dataset"], metrics=data_metrics)
     #Save needed stations
     stations = params_dict["stations"]
 
     #Import needed models
     model, lat_scaler, lon_scaler, xgb_model = im.importModels(
-        pred_dict["model"], output_dict)
+        pred_dict["model"], output_dict, pred_dict["tree_engine"], data_metrics)
 
     #Construct DF with generated predictions and needed input data for those predictions
     df = generatePredictions(model, stations, lat_scaler, lon_scaler, full_df, xgb_model,
                                 output_dict, pred_dict, params_dict)
 
+    #Convert the predicted counts of regression models into the crowdedness classes of the classification models
+    if pred_dict["model"] in ["lr", "rfg", "xgbr"] and os.path.isfile(output_dict["class_bins"]):
+        bin_edges = pickle.load(open(output_dict["class_bins"], 'rb'))
+        df["CrowdednessClass"] = assignClasses(df["CrowdednessCount"], bin_edges)
+
     #Save prediction data to CSV
     df.to_csv(output_dict["predictions"] +
                 "{0}_Predictions.csv".format(pred_dict["model"]), index=False)
\ No newline at end of file
@@ -1,12 +1,19 @@
-import pickle 
+import os
+import pandas as pd
 
-def importModels(model, output_dict):
+from Code.Models.ModelArtifacts import loadModel
+from Code.ImportData.StationWeights import loadScaler
+
+def importModels(model, output_dict, tree_engine=False, data_metrics=None):
     """
-    This function imports scalers 
+    This function imports the prediction model and scalers. The import time of the model is added to the
+    load_metrics file.
 
     Parameters:
     - model (str): desired model to generate predictions with
     - output_dict (dict): dict with all paths of output files
+    - tree_engine (bool): if True, forest and XGBoost models are imported as flat node arrays (see TreeEnsemble)
+    - data_metrics (dict): memory of the imported dataset (see loadDataset), added to the load_metrics file
 
     Returns:
     - model: Imported model
@@ -20,32 +27,39 @@ def importModels(model, output_dict):
 
     #Import needed model
     if model == "rfg":
-        model = pickle.load(
-            open(output_dict["rfg_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["rfg_model"], tree_engine)
     elif model == "xgbr":
-        model = pickle.load(
-            open(output_dict["xgbr_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["xgbr_model"], tree_engine)
         xgb_model = True
     elif model == "rfc":
-        model = pickle.load(
-            open(output_dict["rfc_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["rfc_model"], tree_engine)
     elif model == "xgbc":
-        model = pickle.load(
-            open(output_dict["xgbc_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["xgbc_model"], tree_engine)
         xgb_model = True
     elif model == "lr":
-        model = pickle.load(
-            open(output_dict["lr_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["lr_model"], tree_engine)
     elif model == "dc":
-        model = pickle.load(
-            open(output_dict["dc_model"], 'rb'))
+        model, load_metrics = loadModel(output_dict["dc_model"], tree_engine)
+
+    #Save the import time of the model, with the memory of the dataset
+    load_metrics.update(data_metrics or {})
+    print("Imported the {0} model ({1}, {2:.1f} MB) in {3:.2f} seconds".format(
+        load_metrics["Model"], load_metrics["Format"], load_metrics["Size MB"], load_metrics["Load Time"]))
+    metrics_df = pd.DataFrame([load_metrics])
+
+    #Rows with other columns than the saved file (e.g. without dataset memory) are added by rewriting the file
+    if not os.path.isfile(output_dict["load_metrics"]):
+        metrics_df.to_csv(output_dict["load_metrics"], index=False)
+    elif list(pd.read_csv(output_dict["load_metrics"], nrows=0).columns) == list(metrics_df.columns):
+        metrics_df.to_csv(output_dict["load_metrics"], mode="a", header=False, index=False)
+    else:
+        pd.concat([pd.read_csv(output_dict["load_metrics"]), metrics_df]).to_csv(
+            output_dict["load_metrics"], index=False)
 
     #Import scaler for sensor Latitudes
-    lat_scaler = pickle.load(
-        open(output_dict["lat_scaler"], 'rb'))
+    lat_scaler = loadScaler(output_dict["lat_scaler"])
     
     #Import scaler for sensor Longitudes
-    lon_scaler = pickle.load(
-        open(output_dict["lon_scaler"], 'rb'))
+    lon_scaler = loadScaler(output_dict["lon_scaler"])
 
     return model, lat_scaler, lon_scaler, xgb_model
@@ -0,0 +1,6 @@
+#Imports
+import os
+import sys
+
+#The tests import the scripts as Code.<folder>.<script>, the same as main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+#Imports
+import os
+import sys
+import importlib
+import pandas as pd
+
+#Import own functions
+import Code.ImportData.CacheData as cd
+
+
+def writeInput(path, values):
+    """
+    Writes a small input file with a single column
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({"a": values}).to_csv(path, index=False)
+
+    return path
+
+
+class CountingReader:
+    """
+    Reader that counts how often the input file is parsed
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return pd.read_csv(path)
+
+
+def test_unchanged_file_is_read_from_cache(tmp_path):
+    path = writeInput(str(tmp_path / "input" / "arr.csv"), [1, 2])
+    reader = CountingReader()
+
+    first = cd.readCached(path, reader, str(tmp_path / "cache"))
+    second = cd.readCached(path, reader, str(tmp_path / "cache"))
+
+    assert reader.calls == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_changed_file_or_params_are_parsed_again(tmp_path):
+    path = writeInput(str(tmp_path / "input" / "arr.csv"), [1, 2])
+    cache_dir = str(tmp_path / "cache")
+    reader = CountingReader()
+
+    cd.readCached(path, reader, cache_dir)
+    writeInput(path, [1, 3])
+    assert cd.readCached(path, reader, cache_dir)["a"].tolist() == [1, 3]
+
+    cd.readCached(path, reader, cache_dir, params=["Dam"])
+    assert reader.calls == 3
+
+    #Only the frame of the last parse is kept
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_other_files_keep_their_cached_frames(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = [writeInput(str(tmp_path / "2019" / "arr.csv"), [1]), writeInput(str(tmp_path / "2020" / "arr.csv"), [2]),
+             writeInput(str(tmp_path / "2019" / "arr_2020.csv"), [3])]
+    reader = CountingReader()
+
+    for path in paths:
+        cd.readCached(path, reader, cache_dir)
+
+    #Changing one file doesn't remove the frames of the files with the same or a similar name
+    writeInput(paths[0], [4])
+    cd.readCached(paths[0], reader, cache_dir)
+    for path in paths[1:]:
+        cd.readCached(path, reader, cache_dir)
+
+    assert reader.calls == 4
+    assert len(os.listdir(cache_dir)) == 3
+
+
+def test_changed_reader_code_is_parsed_again(tmp_path, monkeypatch):
+    path = writeInput(str(tmp_path / "input" / "arr.csv"), [1, 2])
+    cache_dir = str(tmp_path / "cache")
+
+    #Reader defined in its own script, so the script can be changed
+    module_dir = tmp_path / "readers"
+    module_dir.mkdir()
+    script = module_dir / "cacheReader.py"
+    script.write_text("import pandas as pd\n\ndef reader(path):\n    return pd.read_csv(path)\n")
+    monkeypatch.syspath_prepend(str(module_dir))
+    module = importlib.import_module("cacheReader")
+
+    key = cd.cacheKey(path, None, module.reader)
+    assert cd.cacheKey(path, None, module.reader) == key
+
+    script.write_text("import pandas as pd\n\ndef reader(path):\n    return pd.read_csv(path) * 2\n")
+    module = importlib.reload(module)
+
+    assert cd.cacheKey(path, None, module.reader) != key
+    assert cd.readCached(path, module.reader, cache_dir)["a"].tolist() == [2, 4]
+
+    sys.modules.pop("cacheReader", None)
@@ -0,0 +1,41 @@
+#Imports
+import pandas as pd
+import pytest
+
+#Import own functions
+from Code.ImportData.CombineData import mergeFanOut, mergeSources
+
+
+def sourceFrames():
+    """
+    Sensor data of two sensors, GVB data with one row per date and hour, and two events on the same date
+    """
+
+    dates = pd.to_datetime(["2019-01-01", "2019-01-02"])
+    sensor_df = pd.DataFrame({"Sensor": ["GAWW-01", "GAWW-02"] * 2, "Date": dates.repeat(2), "Hour": 800,
+                              "weekday": dates.repeat(2).weekday, "CrowdednessCount": [1, 2, 3, 4]})
+    gvb_df = pd.DataFrame({"Date": dates, "Hour": 800, "weekday": dates.weekday, "Dam Arrivals": [10, 20]})
+    event_df = pd.DataFrame({"Date": dates[[0, 0]], "is_event": 1.0})
+
+    return sensor_df, gvb_df, event_df
+
+
+def test_sources_merge_to_one_row_per_sensor_and_hour():
+    sensor_df, gvb_df, event_df = sourceFrames()
+
+    df = mergeSources(sensor_df, gvb_df, event_df)
+
+    assert len(df) == len(sensor_df)
+    assert df.groupby("Date")["event_count"].first().fillna(0).tolist() == [2.0, 0.0]
+
+
+def test_duplicate_keys_stop_the_merge():
+    sensor_df, gvb_df, event_df = sourceFrames()
+
+    #Events that are not reduced to one row per date duplicate both sensor rows of the first date
+    with pytest.raises(ValueError, match="duplicates 2 rows"):
+        mergeFanOut(sensor_df, event_df, ["Date"], "outer", "Events")
+
+    #One-to-many growth of a left merge
+    with pytest.raises(ValueError, match="duplicates"):
+        mergeFanOut(gvb_df, sensor_df, ["Date", "Hour", "weekday"], "left", "GVB/Sensor")
@@ -0,0 +1,41 @@
+#Imports
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+#Import own functions
+from Code.Models.CrossValidation import foldPlan, foldMatrices
+
+
+def trainingSet(n_rows=300, n_dates=15):
+    """
+    Training features and target, of which the target is the row number and feature "a" the row number times 10
+    """
+
+    rng = np.random.default_rng(1)
+    dates = pd.to_datetime("2019-01-01") + pd.to_timedelta(rng.integers(0, n_dates, n_rows), unit="D")
+    x_train = pd.DataFrame({"Date": dates, "a": np.arange(n_rows) * 10.0, "b": rng.random(n_rows)})
+    y_train = pd.DataFrame({"Date": dates, "CrowdednessCount": np.arange(n_rows)})
+
+    return x_train, y_train
+
+
+def test_fold_matrices_follow_the_fold_plan():
+    x_train, y_train = trainingSet()
+    folds = foldPlan(KFold(n_splits=3, shuffle=True, random_state=42), x_train["Date"].unique())
+
+    x, y, columns, cv, dates = foldMatrices(x_train, y_train, folds)
+
+    #The matrix is sorted on date, and the target belongs to the same rows
+    assert columns == ["a", "b"]
+    assert x.dtype == np.float64
+    assert np.all(np.diff(dates) >= np.timedelta64(0))
+    np.testing.assert_array_equal(x[:, 0], y * 10.0)
+
+    #Each row is tested in exactly one split, on the test dates of the fold plan
+    test_rows = np.concatenate([test_index for train_index, test_index in cv])
+    assert np.array_equal(np.sort(test_rows), np.arange(len(x)))
+    for (train_index, test_index), (fold_train_dates, fold_test_dates) in zip(cv, folds):
+        assert set(dates[train_index]) == set(fold_train_dates)
+        assert set(dates[test_index]) == set(fold_test_dates)
+        assert len(train_index) + len(test_index) == len(x)
@@ -0,0 +1,91 @@
+#Imports
+import numpy as np
+import pandas as pd
+import pytest
+
+#Import own functions
+from Code.ImportData.DatasetStorage import lastDate, loadDataset, saveDataset
+
+
+def fullDataset(dates):
+    """
+    Dataset with a sensor row and a row without sensor (sensor 0.0) per date
+    """
+
+    dates = pd.to_datetime(dates).date
+    return pd.DataFrame({"Date": [date for date in dates for _ in range(2)],
+                         "Hour": [800, 900] * len(dates),
+                         "Sensor": ["GAWW-01", 0.0] * len(dates),
+                         "CrowdednessCount": range(2 * len(dates)),
+                         "Dam Lat": 52.37})
+
+
+def storage(tmp_path, dataset_format, partition_sensor=False):
+    """
+    Output paths and hyperparameters of a dataset in tmp_path
+    """
+
+    output_dict = {"full_df": str(tmp_path / "FullDF.csv"), "full_df_parquet": str(tmp_path / "FullDF")}
+    params_dict = {"dataset_format": dataset_format, "partition_sensor": partition_sensor}
+
+    return output_dict, params_dict
+
+
+@pytest.mark.parametrize("dataset_format, partition_sensor", [("csv", False), ("parquet", False), ("parquet", True)])
+def test_save_append_and_filter(tmp_path, dataset_format, partition_sensor):
+    output_dict, params_dict = storage(tmp_path, dataset_format, partition_sensor)
+    assert lastDate(output_dict, params_dict) is None
+
+    saveDataset(fullDataset(["2019-01-30", "2019-01-31"]), output_dict, params_dict)
+    saveDataset(fullDataset(["2019-02-01"]), output_dict, params_dict, append=True)
+
+    #The appended rows are read back in date order, with the columns in the saved order (partitioned by sensor, the 
+    #rows of a date are read per sensor)
+    df = loadDataset(output_dict, params_dict)
+    if partition_sensor:
+        df = df.sort_values(["Date", "Hour"]).reset_index(drop=True)
+    expected = fullDataset(["2019-01-30", "2019-01-31", "2019-02-01"])
+    expected = expected.assign(Date=pd.to_datetime(expected["Date"]), Sensor=expected["Sensor"].astype(str),
+                               CrowdednessCount=[0, 1, 2, 3, 0, 1])
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert lastDate(output_dict, params_dict) == pd.Timestamp("2019-02-01")
+
+    #Only the given columns, dates and sensors are imported
+    df = loadDataset(output_dict, params_dict, columns=["CrowdednessCount", "Date"], start_date="2019-01-31",
+                     end_date="2019-02-01", sensors=["GAWW-01"])
+    assert list(df.columns) == ["CrowdednessCount", "Date"]
+    assert df["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2019-01-31", "2019-02-01"]
+    assert df["CrowdednessCount"].tolist() == [2, 0]
+
+
+def test_save_replaces_the_parquet_dataset(tmp_path):
+    output_dict, params_dict = storage(tmp_path, "parquet")
+
+    saveDataset(fullDataset(["2019-01-30", "2019-01-31"]), output_dict, params_dict)
+    saveDataset(fullDataset(["2019-03-01"]), output_dict, params_dict)
+
+    assert loadDataset(output_dict, params_dict)["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2019-03-01"] * 2
+
+
+@pytest.mark.parametrize("dataset_format", ["csv", "parquet"])
+def test_compact_dataset_keeps_the_values(tmp_path, dataset_format):
+    output_dict, params_dict = storage(tmp_path, dataset_format)
+    df = fullDataset(["2019-01-30", "2019-01-31"]).assign(Hour_sin=[0.5, 0.25, 0.5, 0.25], Hour_cos=np.sin([1, 2, 1, 2]))
+    saveDataset(df, output_dict, params_dict)
+
+    metrics = {}
+    full_df = loadDataset(output_dict, params_dict)
+    compact_df = loadDataset(output_dict, params_dict, compact=True, metrics=metrics)
+
+    #Only the sensor names are stored as category, the other columns stay numeric with the same values
+    assert compact_df["Sensor"].dtype == "category"
+    assert compact_df["Hour"].dtype == np.int16
+    assert compact_df["Hour_sin"].dtype == np.float32
+    assert compact_df["Hour_cos"].dtype == np.float64
+    features = compact_df.drop(columns=["Date", "Sensor"]).to_numpy()
+    assert features.dtype == np.float64
+    np.testing.assert_array_equal(features, full_df.drop(columns=["Date", "Sensor"]).to_numpy())
+    pd.testing.assert_frame_equal(compact_df.astype({"Sensor": str}), full_df, check_dtype=False)
+
+    #The memory before and after compacting is returned to the caller
+    assert metrics["Compact Dataset MB"] < metrics["Dataset MB"]
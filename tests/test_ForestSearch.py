@@ -0,0 +1,37 @@
+#Imports
+from functools import partial
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import GridSearchCV
+
+#Import own functions
+from Code.Models.ForestSearch import WarmStartForestSearch
+from Code.Models.Regression import foldScores
+
+
+@pytest.mark.filterwarnings("ignore:The total space of parameters")
+def test_warm_start_scores_match_a_grid_search():
+    rng = np.random.default_rng(0)
+    x = rng.random((300, 4))
+    y = x @ rng.random(4) + rng.random(300)
+    cv = [(np.arange(300)[np.arange(300) % 3 != k], np.arange(300)[np.arange(300) % 3 == k]) for k in range(3)]
+
+    params = {"n_estimators": [5, 10, 20], "max_features": [1, None]}
+    model = RandomForestRegressor(random_state=42)
+    scoring = partial(foldScores, score="r2")
+
+    #All combinations are sampled, so both searches test the same candidates
+    warm = WarmStartForestSearch(model, params, n_iter=10, scoring=scoring, n_jobs=1, cv=cv, random_state=42).fit(x, y)
+    grid = GridSearchCV(model, params, scoring=scoring, cv=cv, refit="score").fit(x, y)
+
+    grid_scores = {tuple(sorted(candidate.items())): (score, rmse) for candidate, score, rmse in zip(
+        grid.cv_results_["params"], grid.cv_results_["mean_test_score"], grid.cv_results_["mean_test_rmse"])}
+    warm_scores = {tuple(sorted(candidate.items())): (score, rmse) for candidate, score, rmse in zip(
+        warm.cv_results_["params"], warm.cv_results_["mean_test_score"], warm.cv_results_["mean_test_rmse"])}
+
+    assert warm_scores.keys() == grid_scores.keys()
+    for candidate in grid_scores:
+        np.testing.assert_allclose(warm_scores[candidate], grid_scores[candidate])
+    assert warm.best_params_ == grid.best_params_
+    assert warm.n_fits_ == 2 * len(cv)
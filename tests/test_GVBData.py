@@ -0,0 +1,60 @@
+#Imports
+import pandas as pd
+import pytest
+
+#Import own functions
+from Code.ImportData.GVBData import gvbDF
+
+
+def gvbFile(path, prefix, hour_col, rows):
+    """
+    Writes an arrival or departure file with the given (date, hour, station, lat, passengers) rows
+    """
+
+    df = pd.DataFrame(rows, columns=["Datum", hour_col, prefix + "HalteNaam", prefix + "Lat", "AantalReizen"])
+    df[prefix + "Lon"] = 4.9
+    df.to_csv(path, sep=";", index=False)
+
+    return str(path)
+
+
+def gvbFiles(tmp_path, dep_days=3):
+    """
+    GVB files of three days. Dam moves after the first day and Spui has no rows after the first day.
+    """
+
+    rows = []
+    for day in range(1, 4):
+        for hour in ["08:00 - 08:59", "09:00 - 09:59"]:
+            rows.append(("1/%d/2019 12:00:00 AM" % day, hour, "Dam", 52.37 + day / 100, day))
+            if day == 1:
+                rows.append(("1/%d/2019 12:00:00 AM" % day, hour, "Spui", 52.36, 10))
+
+    arr_path = gvbFile(tmp_path / "arr.csv", "Aankomst", "UurgroepOmschrijving (van aankomst)", rows)
+    dep_path = gvbFile(tmp_path / "dep.csv", "Vertrek", "UurgroepOmschrijving (van vertrek)",
+                       [row for row in rows if int(row[0][2]) <= dep_days])
+
+    return arr_path, dep_path
+
+
+@pytest.mark.parametrize("chunk_size", [None, 3])
+def test_update_gives_the_rows_of_a_full_read(tmp_path, chunk_size):
+    arr_path, dep_path = gvbFiles(tmp_path)
+    last_date = pd.Timestamp("2019-01-01")
+
+    full_df = gvbDF(arr_path, dep_path, ["Dam", "Spui"], chunk_size)
+    full_df = full_df[pd.to_datetime(full_df["Date"]) > last_date].reset_index(drop=True)
+    update_df = gvbDF(arr_path, dep_path, ["Dam", "Spui"], chunk_size, last_date=last_date)
+
+    pd.testing.assert_frame_equal(update_df, full_df)
+    assert (update_df["Dam Lat"] == 52.38).all()
+    assert (update_df["Spui Arrivals"] == 0).all()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 3])
+def test_no_new_dates_in_one_file_is_no_new_data(tmp_path, chunk_size):
+    arr_path, dep_path = gvbFiles(tmp_path, dep_days=1)
+
+    update_df = gvbDF(arr_path, dep_path, ["Dam", "Spui"], chunk_size, last_date=pd.Timestamp("2019-01-01"))
+
+    assert update_df.empty
@@ -0,0 +1,83 @@
+#Imports
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+#Import own functions
+from Code.Models.ModelArtifacts import loadModel, saveModel
+from Code.Models.XGBoostModels import EarlyStoppingXGBRegressor
+from Code.ImportData.StationWeights import saveScaler
+from Code.Prediction.importModels import importModels
+
+
+def trainingSet():
+    """
+    Small regression training set
+    """
+
+    rng = np.random.default_rng(0)
+    x = rng.random((200, 4))
+
+    return x, x @ rng.random(4)
+
+
+@pytest.mark.parametrize("model, files", [
+    (RandomForestRegressor(n_estimators=5, random_state=42), ["rfg_model.joblib.z", "rfg_model.trees.joblib"]),
+    (EarlyStoppingXGBRegressor(n_estimators=5), ["rfg_model.joblib.z", "rfg_model.trees.joblib", "rfg_model.ubj"])])
+def test_compressed_model_is_imported(tmp_path, model, files):
+    x, y = trainingSet()
+    model.fit(x, y)
+    path = str(tmp_path / "rfg_model.sav")
+
+    saveModel(model, path, compression=3)
+    loaded, metrics = loadModel(path)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(files)
+    assert metrics["Format"] == "+".join(file.split(".", 1)[1] for file in files if "trees" not in file)
+    np.testing.assert_allclose(loaded.predict(x), model.predict(x))
+
+    #Saving the model uncompressed replaces the compressed file
+    saveModel(model, path)
+    loaded, metrics = loadModel(path)
+
+    assert not os.path.isfile(tmp_path / "rfg_model.joblib.z")
+    assert metrics["Format"].startswith("joblib")
+    np.testing.assert_allclose(loaded.predict(x), model.predict(x))
+
+
+def test_pickled_model_of_earlier_versions_is_imported(tmp_path):
+    x, y = trainingSet()
+    model = RandomForestRegressor(n_estimators=5, random_state=42).fit(x, y)
+    path = str(tmp_path / "rfg_model.sav")
+
+    with pytest.raises(FileNotFoundError):
+        loadModel(path)
+
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    loaded, metrics = loadModel(path)
+
+    assert metrics["Format"] == "sav"
+    np.testing.assert_allclose(loaded.predict(x), model.predict(x))
+
+
+def test_load_metrics_keep_their_columns(tmp_path):
+    x, y = trainingSet()
+    saveModel(RandomForestRegressor(n_estimators=5, random_state=42).fit(x, y), str(tmp_path / "rfg_model.sav"))
+    output_dict = {"rfg_model": str(tmp_path / "rfg_model.sav"), "load_metrics": str(tmp_path / "ModelLoadTimes.csv"),
+                   "lat_scaler": str(tmp_path / "lat_scaler.sav"), "lon_scaler": str(tmp_path / "lon_scaler.sav")}
+    for filename in ["lat_scaler.sav", "lon_scaler.sav"]:
+        saveScaler({"mean": np.array([52.37]), "scale": np.array([0.01])}, str(tmp_path / filename))
+
+    #Imports without and with the memory of the dataset, the earlier rows are kept with the new columns
+    importModels("rfg", output_dict)
+    importModels("rfg", output_dict, data_metrics={"Dataset MB": 2.0, "Compact Dataset MB": 1.0})
+    importModels("rfg", output_dict, data_metrics={"Dataset MB": 2.0, "Compact Dataset MB": 1.0})
+
+    metrics = pd.read_csv(output_dict["load_metrics"])
+    assert list(metrics.columns) == ["Model", "Format", "Size MB", "Load Time", "Dataset MB", "Compact Dataset MB"]
+    assert metrics["Model"].tolist() == ["rfg_model"] * 3
+    assert metrics["Dataset MB"].isna().tolist() == [True, False, False]
@@ -0,0 +1,44 @@
+#Imports
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+#Import own functions
+from Code.Models.ModelArtifacts import saveModel
+from Code.Models.ModelRegistry import cachedResults, modelFingerprint, modelPath, registerModel
+
+
+def trainedModel(tmp_path, intercept):
+    """
+    Saves a linear model with the given intercept as the lr model, and returns the output paths
+    """
+
+    output_dict = {"models": str(tmp_path) + "/", "registry": str(tmp_path / "registry")}
+    x = np.arange(10.0).reshape(-1, 1)
+    saveModel(LinearRegression().fit(x, 2 * x[:, 0] + intercept), modelPath(output_dict, "lr", False))
+
+    return output_dict
+
+
+def test_fingerprint_changes_invalidate_the_registry(tmp_path):
+    output_dict = trainedModel(tmp_path, 1.0)
+    models_dict = {"lr": {"score": "r2", "cycles": 3, "params": {"fit_intercept": [True, False]}}}
+    params_dict = {"remove_sensor": False}
+
+    fingerprint = modelFingerprint("reg", "lr", "data", "folds", models_dict, params_dict)
+    registerModel(output_dict, "lr", False, fingerprint, {"Test R2 Score": 0.5})
+    assert cachedResults(output_dict, "lr", False, fingerprint) == {"Test R2 Score": 0.5}
+
+    #The fingerprint is only the same for the same data, splits and settings
+    changed = [modelFingerprint("reg", "lr", "other data", "folds", models_dict, params_dict),
+               modelFingerprint("reg", "lr", "data", "other folds", models_dict, params_dict),
+               modelFingerprint("reg", "lr", "data", "folds", {"lr": dict(models_dict["lr"], cycles=4)}, params_dict),
+               modelFingerprint("reg", "lr", "data", "folds", models_dict, {"remove_sensor": True})]
+    assert fingerprint == modelFingerprint("reg", "lr", "data", "folds", models_dict, params_dict)
+    for other in changed:
+        assert other != fingerprint
+        assert cachedResults(output_dict, "lr", False, other) is None
+
+    #A saved model that is not the registered model is trained again, as is a model without entry
+    trainedModel(tmp_path, 2.0)
+    assert cachedResults(output_dict, "lr", False, fingerprint) is None
+    assert cachedResults(output_dict, "lr", True, fingerprint) is None
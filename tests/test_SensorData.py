@@ -0,0 +1,36 @@
+#Imports
+import pandas as pd
+import pytest
+
+#Import own functions
+from Code.ImportData.SensorData import sensorCoordinates, sensorData
+
+
+def sensorInputs(sensors):
+    """
+    Counts of the given sensors and the coordinates file with GAWW-01 and GAWW-02
+    """
+
+    sensor_df = pd.DataFrame({"richting": sensors, "datum": "2019-01-01", "uur": 8, "SampleCount": 5})
+    blip_df = pd.DataFrame(columns=["Sensor", "Date", "Hour", "CrowdednessCount"])
+    coor_df = pd.DataFrame({"Objectnummer": ["GAWW-01", "GAWW-02"], "LNG": ["4,89", "4,90"], "LAT": ["52,37", "52,38"]})
+
+    return sensor_df, blip_df, coor_df
+
+
+def test_coordinates_are_joined_per_sensor():
+    sensor_df, blip_df, coor_df = sensorInputs(["GAWW-01", "GAWW-02", "alias"])
+    needed_sensors = ["GAWW-01", "GAWW-02"]
+
+    df = sensorData(blip_df, sensorCoordinates(coor_df, needed_sensors), needed_sensors, sensor_df, ["alias"], [])
+
+    assert df.set_index("Sensor")["CrowdednessCount"].to_dict() == {"GAWW-01": 5, "GAWW-02": 10}
+    assert df.set_index("Sensor")["SensorLatitude"].to_dict() == {"GAWW-01": 52.37, "GAWW-02": 52.38}
+
+
+def test_sensor_without_coordinates_raises():
+    sensor_df, blip_df, coor_df = sensorInputs(["GAWW-01", "GAWW-04"])
+    needed_sensors = ["GAWW-01", "GAWW-04"]
+
+    with pytest.raises(KeyError, match="GAWW-04"):
+        sensorData(blip_df, sensorCoordinates(coor_df, needed_sensors), needed_sensors, sensor_df, [], [])
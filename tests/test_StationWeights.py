@@ -0,0 +1,52 @@
+#Imports
+import os
+import pickle
+import subprocess
+import sys
+import numpy as np
+from sklearn.metrics.pairwise import rbf_kernel
+from sklearn.preprocessing import StandardScaler
+
+#Import own functions
+from Code.ImportData.StationWeights import loadScaler, rbfKernel, saveScaler, scaleCoordinates, stationWeights
+
+
+def test_saved_scaler_scales_as_standard_scaler(tmp_path):
+    lats = np.array([52.371, 52.372, 52.375, 52.38]).reshape(-1, 1)
+    scaler = StandardScaler().fit(lats)
+
+    saveScaler(scaler, str(tmp_path / "lat_scaler.sav"))
+    with open(tmp_path / "old_scaler.sav", "wb") as f:
+        pickle.dump(scaler, f)
+
+    #Scalers of this version and of earlier versions (saved as StandardScaler) give the same scaling
+    for filename in ["lat_scaler.sav", "old_scaler.sav"]:
+        np.testing.assert_array_equal(scaleCoordinates(lats, loadScaler(str(tmp_path / filename))),
+                                      scaler.transform(lats))
+
+
+def test_station_weights_match_the_sklearn_kernel(tmp_path):
+    rng = np.random.default_rng(0)
+    x, y = rng.random((5, 2)), rng.random((3, 2))
+    np.testing.assert_allclose(rbfKernel(x, y), rbf_kernel(x, y), rtol=1e-12)
+
+    #Weights of a sensor, computed on the scaled coordinates
+    lat_scaler = {"mean": np.array([52.37]), "scale": np.array([0.01])}
+    lon_scaler = {"mean": np.array([4.89]), "scale": np.array([0.005])}
+    weights = stationWeights({"GAWW-01": (52.372, 4.898)}, {"Dam": (52.373, 4.893), "Spui": (52.369, 4.89)},
+                             lat_scaler, lon_scaler, str(tmp_path / "weights.sav"))
+
+    x = np.array([[0.2, 1.6]])
+    y = np.array([[0.3, 0.6], [-0.1, 0.0]])
+    assert list(weights.columns) == ["Dam weight", "Spui weight"]
+    np.testing.assert_allclose(weights.loc["GAWW-01"].values, rbf_kernel(x, y)[0], rtol=1e-12)
+
+
+def test_prediction_scripts_import_without_sklearn():
+    #The scripts are imported in a new process in which sklearn can't be imported
+    code = "import sys; sys.modules['sklearn'] = None; import Code.Prediction.Prediction"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,53 @@
+#Imports
+import numpy as np
+import pandas as pd
+
+#Import own functions
+from Code.Models.TrainTestSplit import assignClasses, classBins, dateIndex, foldRows
+
+
+def test_fold_rows_keep_all_rows_of_a_date_together():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Date": pd.to_datetime("2019-01-01") + pd.to_timedelta(rng.integers(0, 20, 500), unit="D")})
+    date_index = dateIndex(df)
+    sorted_dates = df["Date"].values[date_index["order"]]
+
+    dates = df["Date"].unique()
+    fold_dates = [dates[:7], dates[7:], np.append(dates[::3], np.datetime64("2020-01-01"))]
+    for selected in fold_dates:
+        rows = foldRows(date_index, selected)
+
+        #Exactly the rows of the selected dates, each row once, dates that are not in the df are skipped
+        assert len(np.unique(rows)) == len(rows)
+        assert set(sorted_dates[rows]) <= set(selected)
+        assert len(rows) == df["Date"].isin(selected).sum()
+
+    #Splitting the dates splits the rows, all rows of a date are in one of the two splits
+    first, second = foldRows(date_index, fold_dates[0]), foldRows(date_index, fold_dates[1])
+    assert not set(sorted_dates[first]) & set(sorted_dates[second])
+    assert np.array_equal(np.sort(np.concatenate([first, second])), np.arange(len(df)))
+
+
+def test_class_bins_match_qcut():
+    rng = np.random.default_rng(0)
+    counts = pd.Series(rng.integers(0, 500, 1001)).astype(float)
+
+    classes, edges = pd.qcut(counts, [0, .25, .5, .75, 1], labels=[1, 2, 3, 4], retbins=True)
+    bin_edges = classBins(counts)
+
+    #The inner edges of qcut, also when the counts are given in chunks
+    np.testing.assert_allclose(bin_edges, edges[1:-1])
+    np.testing.assert_allclose(classBins(np.array_split(counts.values, 7)), edges[1:-1])
+
+    #The same classes as qcut, except for counts equal to an edge, which are placed in the higher class
+    on_edge = counts.isin(bin_edges).values
+    assert on_edge.any()
+    assigned = assignClasses(counts, bin_edges)
+    assert np.array_equal(assigned[~on_edge], classes.astype(int).values[~on_edge])
+    assert np.array_equal(assigned[on_edge], classes.astype(int).values[on_edge] + 1)
+
+
+def test_assign_classes_keeps_missing_counts():
+    assigned = assignClasses(pd.Series([1.0, np.nan, 5.0]), np.array([2.0, 3.0, 4.0]))
+
+    assert assigned[0] == 1 and np.isnan(assigned[1]) and assigned[2] == 4
@@ -0,0 +1,71 @@
+#Imports
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+
+#Import own functions
+from Code.Models.XGBoostModels import EarlyStoppingXGBRegressor, EarlyStoppingXGBClassifier
+from Code.Models.TreeEnsemble import exportEnsemble, small_batch
+from Code.Benchmarks.benchTreeEngine import generateModelData
+
+#Models of each type and objective that can be exported as tree ensemble
+models = {"rfg": lambda: RandomForestRegressor(n_estimators=20, max_features="sqrt", random_state=42),
+          "rfc": lambda: RandomForestClassifier(n_estimators=20, max_features="sqrt", class_weight="balanced",
+                                                random_state=42),
+          "xgbr_tweedie": lambda: EarlyStoppingXGBRegressor(n_estimators=30, max_depth=6, objective="reg:tweedie",
+                                                            random_state=42),
+          "xgbr_squarederror": lambda: EarlyStoppingXGBRegressor(n_estimators=30, max_depth=6,
+                                                                 objective="reg:squarederror", random_state=42),
+          "xgbc_softmax": lambda: EarlyStoppingXGBClassifier(n_estimators=30, max_depth=6, objective="multi:softmax",
+                                                             random_state=42),
+          "xgbc_softprob": lambda: EarlyStoppingXGBClassifier(n_estimators=30, max_depth=6, objective="multi:softprob",
+                                                              random_state=42)}
+
+
+@pytest.fixture(scope="module")
+def data():
+    """
+    Training set with missing values, and a small and a large batch of rows to predict (see TreeEnsemble.rawPredict)
+    """
+
+    x, counts, classes = generateModelData(2000, 8)
+    x[::17, 3] = np.nan
+
+    x_predict = np.random.default_rng(0).random((4 * small_batch, 8))
+    x_predict[::5, 3] = np.nan
+
+    return {"x": x, "counts": counts, "classes": classes,
+            "batches": {"small": x_predict[:small_batch // 4], "large": x_predict}}
+
+
+@pytest.mark.parametrize("batch", ["small", "large"])
+@pytest.mark.parametrize("name", list(models))
+def test_predictions_match_original_model(data, name, batch):
+    """
+    The tree ensemble gives the same predictions and class probabilities as the model it was exported from
+    """
+
+    classifier = name.startswith(("rfc", "xgbc"))
+    model = models[name]().fit(data["x"], data["classes"] if classifier else data["counts"])
+    ensemble = exportEnsemble(model)
+    x = data["batches"][batch]
+
+    if classifier:
+        np.testing.assert_array_equal(model.predict(x), ensemble.predict(x))
+        np.testing.assert_allclose(model.predict_proba(x), ensemble.predict_proba(x), atol=1e-5)
+
+    #XGBoost sums the leaf values as float32
+    else:
+        np.testing.assert_allclose(model.predict(x), ensemble.predict(x), rtol=1e-4)
+
+
+def test_softmax_probabilities_are_one_hot(data):
+    """
+    Models with the "multi:softmax" objective only return the predicted class, as one-hot rows
+    """
+
+    model = models["xgbc_softmax"]().fit(data["x"], data["classes"])
+    probabilities = exportEnsemble(model).predict_proba(data["batches"]["large"])
+
+    np.testing.assert_array_equal(np.sort(np.unique(probabilities)), [0, 1])
+    np.testing.assert_array_equal(probabilities.sum(axis=1), 1)
@@ -0,0 +1,35 @@
+#Imports
+import numpy as np
+from sklearn.model_selection import RandomizedSearchCV
+
+#Import own functions
+import Code.Models.XGBoostModels as xgbm
+
+
+def searchResults(fit_params):
+    """
+    Scores of a random search of an early stopping XGB model on 3 splits, and the number of cached matrices
+    """
+
+    rng = np.random.default_rng(0)
+    x = rng.random((2000, 6))
+    y = x @ rng.random(6) + rng.random(2000)
+    dates = np.sort(rng.integers(0, 30, 2000))
+    cv = [(np.where(dates % 3 != k)[0], np.where(dates % 3 == k)[0]) for k in range(3)]
+
+    xgbm.matrix_cache.clear()
+    model = xgbm.EarlyStoppingXGBRegressor(n_estimators=10, early_stopping_rounds=3)
+    hyp = RandomizedSearchCV(model, {"max_depth": [3, 4, 5], "subsample": [0.8, 1.0]}, n_iter=4, cv=cv,
+                             random_state=0).fit(x, y, **fit_params(dates))
+
+    return hyp.cv_results_["mean_test_score"], len(xgbm.matrix_cache)
+
+
+def test_search_reuses_the_matrices_of_each_split():
+    scores, cached = searchResults(xgbm.searchFitParams)
+    uncached_scores, not_cached = searchResults(lambda dates: {"dates": dates})
+
+    #One entry per split and one for the refit on the full training set, fits without split key are not cached
+    assert cached == 4
+    assert not_cached == 0
+    np.testing.assert_allclose(scores, uncached_scores)